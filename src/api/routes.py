@@ -1,8 +1,15 @@
 """FastAPI route handlers"""
 
-from collections import deque
-from typing import Optional, List, Dict
-from fastapi import APIRouter, HTTPException, Query, Request
+import heapq
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import suppress
+from functools import lru_cache
+from typing import Optional, List, Dict, Set, Tuple
+from fastapi import APIRouter, Header, HTTPException, Query, Request
 from ..models.api import (
     IngestRequest, 
     AskRequest,
@@ -13,41 +20,102 @@ from ..models.api import (
     AnswerResponse
 )
 from ..services.neo4j_service import (
-    setup_constraints, 
+    ensure_constraints,
     upsert_graph, 
-    index_doc_chunks,
+    upsert_graph_and_chunks,
     fetch_doc_chunks,
-    graph_retrieve
+    DOC_CHUNK_FIELDS
+)
+from ..services.extraction import rule_based_extract_batch, detect_case_id
+from ..utils.thai_parser import (
+    tokenize,
+    parse_person_address,
+    llm_normalize_plaintiff,
+    parse_defendant_info,
+    upsert_defendant_to_graph,
+    parse_employment_info,
+    format_employment_summary,
+    calculate_employment_entitlements,
+    upsert_employment_to_graph,
+    parse_termination_info,
+    format_termination_summary,
+    upsert_termination_to_graph,
+    parse_court_claims,
+    format_court_claims_summary,
+    upsert_court_claims_to_graph,
+    parse_financial_summary,
+    format_financial_summary,
+    upsert_financial_summary_to_graph,
+    parse_legal_references,
+    format_legal_references,
+    upsert_legal_references_to_graph,
+    parse_court_petition,
+    format_court_petition,
+    upsert_court_petition_to_graph,
+    parse_signature_and_compile_document,
+    format_complete_document,
+    upsert_complete_document_to_graph,
+    upsert_thai_provinces,
 )
-from ..services.extraction import rule_based_extract, detect_case_id
-from ..utils.thai_parser import parse_person_address, llm_normalize_plaintiff
 from ..models.graph import SimpleNode, SimpleRel
-from ..services.search import hybrid_search, synthesize_answer
+from ..services.search import hybrid_search, synthesize_answer, cached_graph_retrieve
 from ..models.graph import SimpleGraphDocument
 
 
 # Router instance
 router = APIRouter()
 
-# Ingest buffer for tracking recent case IDs
-INGEST_BUFFER = deque(maxlen=10)
-
-
-def latest_case_id() -> Optional[str]:
-    """Get the most recent case ID from buffer"""
-    try:
-        return INGEST_BUFFER[-1]["case_id"]
-    except (IndexError, KeyError):
-        return None
+# Optional faster JSON parsing (orjson) for the Step 10 all_steps_data payload
+_json_loads = json.loads
+with suppress(ImportError):
+    import orjson
+    _json_loads = orjson.loads
+
+# Recently ingested case IDs, oldest first (insertion-ordered, bounded)
+INGEST_LATEST: Dict[str, None] = {}
+MAX_INGEST_LATEST = 10
+
+# Latest case ID per client, keyed by the X-Session-Id header: session -> (case_id, expires_at)
+SESSION_CASES: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+MAX_SESSION_CASES = 1024
+SESSION_CASE_TTL = 300.0  # seconds
+
+_CASE_LOCK = threading.Lock()
+
+
+def remember_case_id(case_id: str, session_id: Optional[str] = None):
+    """Mark a case ID as the most recently ingested one (globally and for the session)"""
+    with _CASE_LOCK:
+        INGEST_LATEST.pop(case_id, None)
+        INGEST_LATEST[case_id] = None
+        while len(INGEST_LATEST) > MAX_INGEST_LATEST:
+            del INGEST_LATEST[next(iter(INGEST_LATEST))]
+        if session_id:
+            SESSION_CASES[session_id] = (case_id, time.monotonic() + SESSION_CASE_TTL)
+            SESSION_CASES.move_to_end(session_id)
+            while len(SESSION_CASES) > MAX_SESSION_CASES:
+                SESSION_CASES.popitem(last=False)
+
+
+def latest_case_id(session_id: Optional[str] = None) -> Optional[str]:
+    """Get the session's latest case ID, else the most recently ingested one"""
+    with _CASE_LOCK:
+        if session_id:
+            entry = SESSION_CASES.get(session_id)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    return entry[0]
+                del SESSION_CASES[session_id]
+        return next(reversed(INGEST_LATEST), None)
 
 
 @router.post("/ingest", response_model=IngestResponse)
-def ingest(req: IngestRequest):
+def ingest(req: IngestRequest, x_session_id: Optional[str] = Header(None)):
     """Ingest text documents and extract knowledge graph"""
     if not req.texts:
         raise HTTPException(status_code=400, detail="texts is required")
     
-    setup_constraints()
+    ensure_constraints()
     
     # Determine case ID
     provided = (req.case_id or "").strip()
@@ -57,17 +125,14 @@ def ingest(req: IngestRequest):
         case_id = provided
     
     # Extract graph from all chunks
-    all_docs: list[SimpleGraphDocument] = []
-    for chunk in req.texts:
-        docs = rule_based_extract(chunk)
-        all_docs.extend(docs)
+    all_docs = rule_based_extract_batch(req.texts)
+    sections = [d.section for d in all_docs]
     
     # Upsert to Neo4j
-    upsert_graph(all_docs, case_id)
-    index_doc_chunks(req.texts, case_id)
+    upsert_graph_and_chunks(all_docs, req.texts, case_id, sections)
     
     # Track in buffer
-    INGEST_BUFFER.append({"texts": req.texts, "case_id": case_id})
+    remember_case_id(case_id, x_session_id)
     
     return {"case_id": case_id, "chunks": len(req.texts)}
 
@@ -75,7 +140,7 @@ def ingest(req: IngestRequest):
 @router.get("/cases/{case_id}/facts", response_model=FactResponse)
 def get_facts(case_id: str, limit: int = 20):
     """Get graph facts for a specific case"""
-    facts = graph_retrieve(case_id=case_id, limit=limit)
+    facts = cached_graph_retrieve(case_id, limit)
     return {"case_id": case_id, "facts": facts}
 
 
@@ -88,40 +153,46 @@ def health_check():
 @router.get("/chunks/{case_id}", response_model=ChunkResponse)
 def get_chunks(case_id: str):
     """Get document chunks for a specific case"""
-    items = fetch_doc_chunks(case_id)
+    items = [dict(zip(DOC_CHUNK_FIELDS, row)) for row in fetch_doc_chunks(case_id)]
     return {"case_id": case_id, "chunks": items}
 
 
 @router.get("/search", response_model=SearchResponse)
-def search(q: str = Query(..., min_length=1), case_id: Optional[str] = None, k: int = 5):
+def search(
+    q: str = Query(..., min_length=1),
+    case_id: Optional[str] = None,
+    k: int = 5,
+    x_session_id: Optional[str] = Header(None),
+):
     """Search documents and graph"""
-    case_id = case_id or latest_case_id()
+    case_id = case_id or latest_case_id(x_session_id)
     docs, facts = hybrid_search(q, case_id=case_id, k=k)
     
     return {"query": q, "case_id": case_id, "top_docs": docs, "facts": facts}
 
 
 @router.get("/answer", response_model=AnswerResponse)
-def answer(q: str = Query(..., min_length=1), case_id: Optional[str] = None, k: int = 5):
+def answer(
+    q: str = Query(..., min_length=1),
+    case_id: Optional[str] = None,
+    k: int = 5,
+    x_session_id: Optional[str] = Header(None),
+):
     """Answer questions using hybrid search"""
-    case_id = case_id or latest_case_id()
+    case_id = case_id or latest_case_id(x_session_id)
     doc_hits, facts = hybrid_search(q, case_id=case_id, k=k)
     ans = synthesize_answer(q, doc_hits, facts, case_id=case_id)
-    
-    # Clear buffer after answering
-    INGEST_BUFFER.clear()
-    
     return {"query": q, "case_id": case_id, "answer": ans, "doc_hits": doc_hits, "facts": facts}
 
 
 @router.post("/ask", response_model=AnswerResponse)
-def ask(req: AskRequest):
+def ask(req: AskRequest, x_session_id: Optional[str] = Header(None)):
     """Answer questions (POST version)"""
     q = (req.question or "").strip()
     if not q:
         raise HTTPException(status_code=400, detail="question is required")
     
-    cid = req.case_id or latest_case_id()
+    cid = req.case_id or latest_case_id(x_session_id)
     doc_hits, facts = hybrid_search(q, case_id=cid, k=req.k)
     ans = synthesize_answer(q, doc_hits, facts, case_id=cid)
     
@@ -166,24 +237,352 @@ COURT_DOCUMENTS = [
     }
 ]
 
-def fuzzy_match(query: str, text: str) -> float:
-    """Simple fuzzy matching score"""
-    query_lower = query.lower()
-    text_lower = text.lower()
-    
+@lru_cache(maxsize=1024)
+def _words(text: str) -> frozenset:
+    """Thai-aware word set of a (lowercased) string, memoized for repeated queries"""
+    return frozenset(tokenize(text))
+
+
+def _match_lowered(query_lower: str, query_words: set, text_lower: str, text_words: set) -> float:
+    """Simple fuzzy matching score of a lowercased query and text with their word sets"""
     # Direct substring match
     if query_lower in text_lower:
         return 1.0
-    
+
     # Word-based matching
-    query_words = set(query_lower.split())
-    text_words = set(text_lower.split())
-    
     if not query_words:
         return 0.0
-    
-    common_words = query_words.intersection(text_words)
-    return len(common_words) / len(query_words)
+    return len(query_words & text_words) / len(query_words)
+
+
+# Pre-lowered, pre-split searchable fields per court document: (text, words, weight)
+_COURT_DOC_FIELDS: List[List[Tuple[str, set, float]]] = []
+_COURT_DOC_BLOBS: List[str] = []  # all fields of a doc joined, for substring candidates
+_COURT_DOC_INDEX: Dict[str, List[int]] = defaultdict(list)  # word -> doc indices
+for _i, _doc in enumerate(COURT_DOCUMENTS):
+    _fields = [(_doc["title"].lower(), 1.0), (_doc["description"].lower(), 0.8)]
+    _fields += [(kw.lower(), 0.9) for kw in _doc.get("keywords", [])]
+    _COURT_DOC_FIELDS.append([(text, _words(text), weight) for text, weight in _fields])
+    _COURT_DOC_BLOBS.append("\0".join(text for text, _ in _fields))
+    for _word in {w for text, _ in _fields for w in _words(text)}:
+        _COURT_DOC_INDEX[_word].append(_i)
+
+
+@lru_cache(maxsize=1024)
+def _court_document_scores(query_lower: str, threshold: float) -> Tuple[Tuple[int, float], ...]:
+    """(doc index, score) of the COURT_DOCUMENTS scoring above threshold; cached per query"""
+    query_words = _words(query_lower)
+
+    # Only documents sharing a word or containing the whole query can score > 0
+    candidates = {i for w in query_words for i in _COURT_DOC_INDEX.get(w, ())}
+    candidates.update(i for i, blob in enumerate(_COURT_DOC_BLOBS) if query_lower in blob)
+
+    scores: List[Tuple[int, float]] = []
+    for i in sorted(candidates):
+        final_score = 0.0
+        for text, words, weight in _COURT_DOC_FIELDS[i]:
+            final_score = max(final_score, _match_lowered(query_lower, query_words, text, words) * weight)
+        if final_score > threshold:
+            scores.append((i, final_score))
+    return tuple(scores)
+
+
+def score_court_documents(query: str, threshold: float) -> List[Dict]:
+    """Score COURT_DOCUMENTS against a query (best weighted field match per document)"""
+    return [
+        {**COURT_DOCUMENTS[i], "score": score}
+        for i, score in _court_document_scores(query.lower(), threshold)
+    ]
+
+
+def _keyword_re(keywords: Tuple[str, ...]) -> str:
+    """Join keywords into one alternation (longest first)"""
+    return "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+
+
+# Heuristic template triggers for /court-documents/search, matched in one scan;
+# each hit reports its template via lastgroup
+_TEMPLATE_TRIGGERS = {
+    "unfair_dismissal": ("เลิกจ้างไม่เป็นธรรม", "เลิกจ้าง", "ไม่เป็นธรรม"),
+    "unpaid_wages": ("ค่าจ้างค้างจ่าย", "ค่าจ้าง", "ค้างจ่าย", "ล่วงเวลา"),
+}
+_TEMPLATE_TRIGGER_RE = re.compile(
+    "|".join(f"(?P<{name}>{_keyword_re(kws)})" for name, kws in _TEMPLATE_TRIGGERS.items())
+)
+
+
+def _template_hits(pool: str) -> Set[str]:
+    """Names of the templates triggered in pool, stopping once all are seen"""
+    hits: Set[str] = set()
+    for m in _TEMPLATE_TRIGGER_RE.finditer(pool):
+        hits.add(m.lastgroup)
+        if len(hits) == len(_TEMPLATE_TRIGGERS):
+            break
+    return hits
+
+
+def _plaintiff_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 2: parse plaintiff info"""
+    try:
+        info = llm_normalize_plaintiff(q)
+        source = "llm"
+    except Exception:
+        info = parse_person_address(q)
+        source = "rule_based"
+
+    # build formatted Thai sentence
+    name = ((info.get("title") or "") + (info.get("full_name") or "")).strip()
+    parts: List[str] = []
+    if name:
+        parts.append(f"โจทก์ชื่อ {name}")
+    if info.get("age") is not None:
+        parts.append(f"อายุ {info['age']} ปี")
+    addr = []
+    if info.get("house_no"):
+        addr.append(f"อยู่บ้านเลขที่ {info['house_no']}")
+    loc = []
+    if info.get("subdistrict"): loc.append(f"ตำบล{info['subdistrict']}")
+    if info.get("district"): loc.append(f"อำเภอ{info['district']}")
+    if info.get("province"): loc.append(f"จังหวัด{info['province']}")
+    if info.get("postal_code"): loc.append(str(info["postal_code"]))
+    if loc: addr.append(" ".join(loc))
+    if addr: parts.append(" ".join(addr))
+    formatted = " ".join(parts)
+
+    return {"parsed": info, "formatted": formatted, "normalize_source": source}
+
+
+def _defendant_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 3: parse defendant info and store it to the graph"""
+    info = parse_defendant_info(q)
+
+    # Build formatted sentence
+    parts: List[str] = []
+    if info.get("entity_type") == "Company":
+        if info.get("name"):
+            parts.append(f"จำเลยคือ {info['name']}")
+    else:
+        if info.get("name"):
+            parts.append(f"จำเลยชื่อ {info['name']}")
+
+    # Address formatting
+    addr = []
+    if info.get("address"):
+        addr.append(f"ตั้งอยู่ที่ {info['address']}")
+    elif info.get("house_no") or info.get("street") or info.get("district") or info.get("province"):
+        addr_parts = []
+        if info.get("house_no"):
+            addr_parts.append(info["house_no"])
+        if info.get("street"):
+            addr_parts.append(info["street"])
+        if info.get("district"):
+            addr_parts.append(f"อำเภอ{info['district']}")
+        if info.get("province"):
+            addr_parts.append(f"จังหวัด{info['province']}")
+        if info.get("postal_code"):
+            addr_parts.append(info["postal_code"])
+        if addr_parts:
+            addr.append(f"ตั้งอยู่ที่ {' '.join(addr_parts)}")
+
+    if addr:
+        parts.extend(addr)
+
+    if info.get("phone"):
+        parts.append(f"โทร. {info['phone']}")
+
+    formatted = " ".join(parts)
+
+    # Store defendant info to Neo4j graph
+    try:
+        upsert_defendant_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store defendant to graph: {e}")
+
+    return {"parsed": info, "formatted": formatted}
+
+
+def _employment_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 4: parse employment info, compute entitlements and store them to the graph"""
+    info = parse_employment_info(q)
+    formatted = format_employment_summary(info, cid)
+
+    # Severance pay, interest/penalty (30 days overdue example) and advance notice pay
+    entitlements = calculate_employment_entitlements(info)
+
+    # Store employment info to Neo4j graph
+    try:
+        upsert_employment_to_graph(info, cid, entitlements)
+    except Exception as e:
+        print(f"Failed to store employment to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "severance_calculation": entitlements["severance"],
+        "interest_calculation": entitlements["interest"],
+        "advance_notice_calculation": entitlements["advance_notice"]
+    }
+
+
+def _termination_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 5: parse termination info and store it to the graph"""
+    info = parse_termination_info(q)
+    formatted = format_termination_summary(info, cid)
+
+    # Store termination info to Neo4j graph
+    try:
+        upsert_termination_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store termination to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "legal_summary": info.get("legal_summary", ""),
+        "violations": info.get("violations", []),
+        "violation_count": info.get("violation_count", 0)
+    }
+
+
+def _claims_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 6: parse court claims and store them to the graph"""
+    info = parse_court_claims(q)
+    formatted = format_court_claims_summary(info, cid)
+
+    # Store court claims to Neo4j graph
+    try:
+        upsert_court_claims_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store court claims to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "formal_request": info.get("formal_request", ""),
+        "detected_claims": info.get("detected_claims", []),
+        "claim_count": info.get("claim_count", 0)
+    }
+
+
+def _financial_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 7: parse the financial summary and store it to the graph"""
+    # Step 4 data is not carried between requests yet, so parse without it
+    info = parse_financial_summary(q)
+    formatted = format_financial_summary(info, cid)
+
+    # Store financial summary to Neo4j graph
+    try:
+        upsert_financial_summary_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store financial summary to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "formal_summary": info.get("formal_summary", ""),
+        "requested_amount": info.get("requested_amount"),
+        "calculated_total": info.get("calculated_total", 0),
+        "calculations": info.get("calculations", {}),
+        "has_calculations": info.get("has_calculations", False)
+    }
+
+
+def _legal_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 8: parse legal references and store them to the graph"""
+    # Context from previous steps is not carried between requests yet
+    info = parse_legal_references(q)
+    formatted = format_legal_references(info, cid)
+
+    # Store legal references to Neo4j graph
+    try:
+        upsert_legal_references_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store legal references to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "formal_citation": info.get("formal_citation", ""),
+        "legal_references": info.get("legal_references", []),
+        "detected_topics": info.get("detected_topics", []),
+        "reference_count": info.get("reference_count", 0),
+        "primary_law": info.get("primary_law", "")
+    }
+
+
+def _petition_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 9: parse the court petition and store it to the graph"""
+    info = parse_court_petition(q)
+    formatted = format_court_petition(info, cid)
+
+    # Store petition to Neo4j graph
+    try:
+        upsert_court_petition_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store court petition to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "formal_petition": info.get("formal_petition", ""),
+        "detected_claims": info.get("detected_claims", []),
+        "legal_articles": info.get("legal_articles", []),
+        "primary_law": info.get("primary_law", ""),
+        "secondary_laws": info.get("secondary_laws", []),
+        "claim_count": info.get("claim_count", 0),
+        "article_count": info.get("article_count", 0),
+        "assessment": info.get("assessment", "")
+    }
+
+
+def _document_block(q: str, cid: Optional[str], all_steps_data: Optional[str]) -> Dict:
+    """Step 10: compile the complete document from all steps and store it to the graph"""
+    steps_data = {}
+    if all_steps_data:
+        try:
+            steps_data = _json_loads(all_steps_data)
+            print(f"Received steps data for Step 10: {len(steps_data)} steps")
+        except Exception as e:
+            print(f"Failed to parse all_steps_data JSON: {e}")
+            steps_data = {}
+
+    # Parse signature and compile complete document
+    info = parse_signature_and_compile_document(q, steps_data)
+    formatted = format_complete_document(info, cid)
+
+    # Store complete document to Neo4j graph
+    try:
+        upsert_complete_document_to_graph(info, cid)
+    except Exception as e:
+        print(f"Failed to store complete document to graph: {e}")
+
+    return {
+        "parsed": info,
+        "formatted": formatted,
+        "compiled_document": info.get("compiled_document", ""),
+        "signature_info": info.get("signature_info", {}),
+        "document_sections": info.get("document_sections", []),
+        "total_sections": info.get("total_sections", 0),
+        "total_words": info.get("total_words", 0),
+        "total_lines": info.get("total_lines", 0),
+        "completion_percentage": info.get("completion_percentage", 0),
+        "document_summary": info.get("document_summary", "")
+    }
+
+
+# step -> (response key, block builder) for /court-documents/search
+_STEP_HANDLERS = {
+    2: ("plaintiff", _plaintiff_block),
+    3: ("defendant", _defendant_block),
+    4: ("employment", _employment_block),
+    5: ("termination", _termination_block),
+    6: ("claims", _claims_block),
+    7: ("financial", _financial_block),
+    8: ("legal", _legal_block),
+    9: ("petition", _petition_block),
+    10: ("document", _document_block),
+}
+
 
 @router.get("/court-documents/search")
 def search_court_documents(
@@ -193,38 +592,37 @@ def search_court_documents(
     k: int = 5,
     step: Optional[int] = Query(None, description="Workflow step hint (e.g., 2 for plaintiff info)"),
     all_steps_data: Optional[str] = Query(None, description="JSON string of all steps data for Step 10"),
+    x_session_id: Optional[str] = Header(None),
 ):
     """Suggest court document template using hybrid KG search with fuzzy fallback"""
-    cid = case_id or latest_case_id()
+    cid = case_id or latest_case_id(x_session_id)
 
     try:
         # Try hybrid search with Neo4j first
         doc_hits, facts = hybrid_search(q, case_id=cid, k=k)
 
         # Aggregate context
-        pool_parts: List[str] = [q]
-        pool_parts.extend([d.get("text", "") for d in doc_hits])
-        for f in facts:
-            pool_parts.append(str(f.get("person", "")))
-            pool_parts.append(str(f.get("role", "")))
-            pool_parts.append(str(f.get("amount", "")))
-            pool_parts.append(str(f.get("date", "")))
-        pool = " ".join(pool_parts).lower()
+        pool = " ".join([
+            q,
+            *(d["text"] for d in doc_hits if d.get("text")),
+            *(str(f[key]) for f in facts for key in ("person", "role", "amount", "date") if f.get(key)),
+        ]).lower()
 
         suggestions: List[Dict] = []
 
         # Heuristic mapping from query+facts to document templates
-        if any(kw in pool for kw in ["เลิกจ้างไม่เป็นธรรม", "เลิกจ้าง", "ไม่เป็นธรรม"]):
+        hits = _template_hits(pool)
+        if "unfair_dismissal" in hits:
             suggestions.append({
                 "id": 1,
                 "title": "คำฟ้องคดีแรงงาน รง1",
                 "description": "คำฟ้องคดีแรงงาน เลิกจ้างไม่เป็นธรรม",
                 "keywords": ["คดีแรงงาน", "เลิกจ้าง", "ไม่เป็นธรรม", "คำฟ้อง", "รง1"],
                 "court": "ศาลแรงงานกลาง",
-                "score": max([d.get("score", 0.0) for d in doc_hits] or [0.8]),
+                "score": max((d.get("score", 0.0) for d in doc_hits), default=0.8),
             })
 
-        if any(kw in pool for kw in ["ค่าจ้างค้างจ่าย", "ค่าจ้าง", "ค้างจ่าย", "ล่วงเวลา"]):
+        if "unpaid_wages" in hits:
             suggestions.append({
                 "id": 3,
                 "title": "คำฟ้องคดีค่าจ้างค้างจ่าย รง1",
@@ -236,514 +634,57 @@ def search_court_documents(
 
         # If Neo4j worked but no suggestions, fallback to fuzzy
         if not suggestions:
-            for doc in COURT_DOCUMENTS:
-                title_score = fuzzy_match(q, doc["title"])
-                desc_score = fuzzy_match(q, doc["description"]) * 0.8
-                keyword_score = 0.0
-                for keyword in doc.get("keywords", []):
-                    keyword_score = max(keyword_score, fuzzy_match(q, keyword))
-                keyword_score *= 0.9
-                final_score = max(title_score, desc_score, keyword_score)
-                if final_score > 0.2:
-                    suggestions.append({**doc, "score": final_score})
+            suggestions.extend(score_court_documents(q, 0.2))
 
     except Exception as e:
         # Neo4j failed, fallback to simple search
         print(f"Neo4j search failed: {e}, falling back to simple search")
         return search_court_documents_simple(q, case_id, k)
 
-    # Optional: Step 2 support (parse plaintiff info using same endpoint)
-    plaintiff_block: Optional[Dict] = None
-    try:
-        if step == 2:
-            info = None
-            source = "rule_based"
-            try:
-                info = llm_normalize_plaintiff(q)
-                source = "llm"
-            except Exception:
-                info = parse_person_address(q)
-                source = "rule_based"
-
-            # build formatted Thai sentence
-            name = ((info.get("title") or "") + (info.get("full_name") or "")).strip()
-            parts: list[str] = []
-            if name:
-                parts.append(f"โจทก์ชื่อ {name}")
-            if info.get("age") is not None:
-                parts.append(f"อายุ {info['age']} ปี")
-            addr = []
-            if info.get("house_no"):
-                addr.append(f"อยู่บ้านเลขที่ {info['house_no']}")
-            loc = []
-            if info.get("subdistrict"): loc.append(f"ตำบล{info['subdistrict']}")
-            if info.get("district"): loc.append(f"อำเภอ{info['district']}")
-            if info.get("province"): loc.append(f"จังหวัด{info['province']}")
-            if info.get("postal_code"): loc.append(str(info["postal_code"]))
-            if loc: addr.append(" ".join(loc))
-            if addr: parts.append(" ".join(addr))
-            formatted = " ".join(parts)
-
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "plaintiff": {"parsed": info, "formatted": formatted, "normalize_source": source},
-            }
-            return resp
-    except Exception:
-        pass
-
-    # Optional: Step 3 support (parse defendant info)
-    defendant_block: Optional[Dict] = None
-    try:
-        if step == 3:
-            from ..utils.thai_parser import parse_defendant_info
-            info = parse_defendant_info(q)
-            
-            # Build formatted sentence
-            parts: List[str] = []
-            if info.get("entity_type") == "Company":
-                if info.get("name"):
-                    parts.append(f"จำเลยคือ {info['name']}")
-            else:
-                if info.get("name"):
-                    parts.append(f"จำเลยชื่อ {info['name']}")
-            
-            # Address formatting
-            addr = []
-            if info.get("address"):
-                addr.append(f"ตั้งอยู่ที่ {info['address']}")
-            elif info.get("house_no") or info.get("street") or info.get("district") or info.get("province"):
-                addr_parts = []
-                if info.get("house_no"):
-                    addr_parts.append(info["house_no"])
-                if info.get("street"):
-                    addr_parts.append(info["street"])
-                if info.get("district"):
-                    addr_parts.append(f"อำเภอ{info['district']}")
-                if info.get("province"):
-                    addr_parts.append(f"จังหวัด{info['province']}")
-                if info.get("postal_code"):
-                    addr_parts.append(info["postal_code"])
-                if addr_parts:
-                    addr.append(f"ตั้งอยู่ที่ {' '.join(addr_parts)}")
-            
-            if addr:
-                parts.extend(addr)
-            
-            if info.get("phone"):
-                parts.append(f"โทร. {info['phone']}")
-            
-            formatted = " ".join(parts)
-            
-            defendant_block = {
-                "parsed": info,
-                "formatted": formatted
-            }
-            
-            # Store defendant info to Neo4j graph
-            try:
-                from ..utils.thai_parser import upsert_defendant_to_graph
-                upsert_defendant_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store defendant to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "defendant": defendant_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 3 parsing failed: {e}")
-        pass
-
-    # Optional: Step 4 support (parse employment info)
-    employment_block: Optional[Dict] = None
-    try:
-        if step == 4:
-            from ..utils.thai_parser import parse_employment_info, format_employment_summary, calculate_labor_law_interest, calculate_severance_pay, calculate_advance_notice_pay
-            info = parse_employment_info(q)
-            
-            # Format summary
-            formatted = format_employment_summary(info, cid)
-            
-            # Calculate severance pay
-            severance_calculation = None
-            if info.get("daily_wage") and info.get("years") is not None:
-                severance_calculation = calculate_severance_pay(
-                    info["daily_wage"], 
-                    info.get("years", 0), 
-                    info.get("months", 0)
-                )
-            
-            # Calculate potential interest/penalty (example with 30 days overdue)
-            interest_calculation = None
-            if info.get("daily_wage"):
-                # Example calculation for unpaid wages (30 days)
-                unpaid_amount = info["daily_wage"] * 30  # Assume 30 days unpaid
-                interest_calculation = calculate_labor_law_interest(unpaid_amount, 30)
-            
-            # Calculate advance notice pay
-            advance_notice_calculation = None
-            if info.get("daily_wage"):
-                advance_notice_calculation = calculate_advance_notice_pay(
-                    info["daily_wage"],
-                    info.get("payment_period", "รายเดือน"),
-                    info.get("termination_reason", "เลิกจ้างโดยนายจ้าง")
-                )
-            
-            employment_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "severance_calculation": severance_calculation,
-                "interest_calculation": interest_calculation,
-                "advance_notice_calculation": advance_notice_calculation
-            }
-            
-            # Store employment info to Neo4j graph
-            try:
-                from ..utils.thai_parser import upsert_employment_to_graph
-                upsert_employment_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store employment to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "employment": employment_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 4 parsing failed: {e}")
-        pass
-
-    # Optional: Step 5 support (parse termination info)
-    termination_block: Optional[Dict] = None
-    try:
-        if step == 5:
-            from ..utils.thai_parser import parse_termination_info, format_termination_summary, upsert_termination_to_graph
-            info = parse_termination_info(q)
-            
-            # Format summary
-            formatted = format_termination_summary(info, cid)
-            
-            termination_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "legal_summary": info.get("legal_summary", ""),
-                "violations": info.get("violations", []),
-                "violation_count": info.get("violation_count", 0)
-            }
-            
-            # Store termination info to Neo4j graph
-            try:
-                upsert_termination_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store termination to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "termination": termination_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 5 parsing failed: {e}")
-        pass
-
-    # Optional: Step 6 support (parse court claims)
-    claims_block: Optional[Dict] = None
-    try:
-        if step == 6:
-            from ..utils.thai_parser import parse_court_claims, format_court_claims_summary, upsert_court_claims_to_graph
-            info = parse_court_claims(q)
-            
-            # Format summary
-            formatted = format_court_claims_summary(info, cid)
-            
-            claims_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "formal_request": info.get("formal_request", ""),
-                "detected_claims": info.get("detected_claims", []),
-                "claim_count": info.get("claim_count", 0)
-            }
-            
-            # Store court claims to Neo4j graph
-            try:
-                upsert_court_claims_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store court claims to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "claims": claims_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 6 parsing failed: {e}")
-        pass
-
-    # Optional: Step 7 support (financial summary)
-    financial_block: Optional[Dict] = None
-    try:
-        if step == 7:
-            from ..utils.thai_parser import parse_financial_summary, format_financial_summary, upsert_financial_summary_to_graph
-            
-            # Try to get employment data from Step 4 first
-            employment_info = None
-            severance_info = None
-            advance_notice_info = None
-            
-            # Re-run Step 4 parsing to get financial data
-            try:
-                from ..utils.thai_parser import parse_employment_info, calculate_severance_pay, calculate_advance_notice_pay
-                
-                # Try to get Step 4 data from session/cache or re-parse
-                # For now, we'll assume the user has gone through Step 4
-                # In a real implementation, you might want to store this in session or database
-                
-                # Parse financial summary with available data
-                info = parse_financial_summary(
-                    q, 
-                    employment_info=employment_info,
-                    advance_notice_info=advance_notice_info,
-                    severance_info=severance_info
-                )
-                
-            except Exception as e:
-                print(f"Failed to get Step 4 data for financial summary: {e}")
-                # Parse without Step 4 data
-                info = parse_financial_summary(q)
-            
-            # Format summary
-            formatted = format_financial_summary(info, cid)
-            
-            financial_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "formal_summary": info.get("formal_summary", ""),
-                "requested_amount": info.get("requested_amount"),
-                "calculated_total": info.get("calculated_total", 0),
-                "calculations": info.get("calculations", {}),
-                "has_calculations": info.get("has_calculations", False)
-            }
-            
-            # Store financial summary to Neo4j graph
-            try:
-                upsert_financial_summary_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store financial summary to graph: {e}")
-            
-            resp = {
+    # Optional: per-step parsing (Steps 2-10 of the document workflow)
+    handler = _STEP_HANDLERS.get(step)
+    if handler is not None:
+        key, build = handler
+        try:
+            block = build(q, cid, all_steps_data)
+            return {
                 "query": q,
                 "case_id": cid,
                 "results": suggestions[:5],
                 "total": len(suggestions),
                 "source": "hybrid_search",
-                "financial": financial_block,
+                key: block,
             }
-            return resp
-    except Exception as e:
-        print(f"Step 7 parsing failed: {e}")
-        pass
+        except Exception as e:
+            print(f"Step {step} parsing failed: {e}")
 
-    # Optional: Step 8 support (legal references)
-    legal_block: Optional[Dict] = None
-    try:
-        if step == 8:
-            from ..utils.thai_parser import parse_legal_references, format_legal_references, upsert_legal_references_to_graph
-            
-            # Try to get context from previous steps
-            # In a real implementation, you'd fetch this from session/database
-            employment_context = None
-            termination_context = None
-            claims_context = None
-            financial_context = None
-            
-            # Parse legal references with context
-            info = parse_legal_references(
-                q,
-                employment_info=employment_context,
-                termination_info=termination_context,
-                claims_info=claims_context,
-                financial_info=financial_context
-            )
-            
-            # Format citation
-            formatted = format_legal_references(info, cid)
-            
-            legal_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "formal_citation": info.get("formal_citation", ""),
-                "legal_references": info.get("legal_references", []),
-                "detected_topics": info.get("detected_topics", []),
-                "reference_count": info.get("reference_count", 0),
-                "primary_law": info.get("primary_law", "")
-            }
-            
-            # Store legal references to Neo4j graph
-            try:
-                upsert_legal_references_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store legal references to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "legal": legal_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 8 parsing failed: {e}")
-        pass
-
-    # Optional: Step 9 support (court petition)
-    petition_block: Optional[Dict] = None
-    try:
-        if step == 9:
-            from ..utils.thai_parser import parse_court_petition, format_court_petition, upsert_court_petition_to_graph
-            
-            # Parse court petition
-            info = parse_court_petition(q)
-            
-            # Format petition
-            formatted = format_court_petition(info, cid)
-            
-            petition_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "formal_petition": info.get("formal_petition", ""),
-                "detected_claims": info.get("detected_claims", []),
-                "legal_articles": info.get("legal_articles", []),
-                "primary_law": info.get("primary_law", ""),
-                "secondary_laws": info.get("secondary_laws", []),
-                "claim_count": info.get("claim_count", 0),
-                "article_count": info.get("article_count", 0),
-                "assessment": info.get("assessment", "")
-            }
-            
-            # Store petition to Neo4j graph
-            try:
-                upsert_court_petition_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store court petition to graph: {e}")
-            
-            resp = {
-                "query": q,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "petition": petition_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 9 parsing failed: {e}")
-        pass
-
-    # Optional: Step 10 support (complete document compilation)
-    document_block: Optional[Dict] = None
-    try:
-        if step == 10:
-            from ..utils.thai_parser import parse_signature_and_compile_document, format_complete_document, upsert_complete_document_to_graph
-            
-            # Get all steps data from query parameter or use empty data
-            signature_text = q
-            steps_data = {}
-            
-            if all_steps_data:
-                try:
-                    import json
-                    steps_data = json.loads(all_steps_data)
-                    print(f"Received steps data for Step 10: {len(steps_data)} steps")
-                except Exception as e:
-                    print(f"Failed to parse all_steps_data JSON: {e}")
-                    steps_data = {}
-            else:
-                # No steps data provided, will show just signature
-                steps_data = {}
-            
-            # Parse signature and compile complete document
-            info = parse_signature_and_compile_document(signature_text, steps_data)
-            
-            # Format complete document
-            formatted = format_complete_document(info, cid)
-            
-            document_block = {
-                "parsed": info,
-                "formatted": formatted,
-                "compiled_document": info.get("compiled_document", ""),
-                "signature_info": info.get("signature_info", {}),
-                "document_sections": info.get("document_sections", []),
-                "total_sections": info.get("total_sections", 0),
-                "total_words": info.get("total_words", 0),
-                "total_lines": info.get("total_lines", 0),
-                "completion_percentage": info.get("completion_percentage", 0),
-                "document_summary": info.get("document_summary", "")
-            }
-            
-            # Store complete document to Neo4j graph
-            try:
-                upsert_complete_document_to_graph(info, cid)
-            except Exception as e:
-                print(f"Failed to store complete document to graph: {e}")
-            
-            resp = {
-                "query": signature_text,
-                "case_id": cid,
-                "results": suggestions[:5],
-                "total": len(suggestions),
-                "source": "hybrid_search",
-                "document": document_block,
-            }
-            return resp
-    except Exception as e:
-        print(f"Step 10 parsing failed: {e}")
-        pass
-
-    # Sort and return
-    suggestions.sort(key=lambda x: x.get("score", 0.0), reverse=True)
-    resp = {
+    # Top 5 by score and return
+    return {
         "query": q,
         "case_id": cid,
-        "results": suggestions[:5],
+        "results": heapq.nlargest(5, suggestions, key=lambda x: x.get("score", 0.0)),
         "total": len(suggestions),
         "source": "hybrid_search",
     }
-    if plaintiff_block:
-        resp["plaintiff"] = plaintiff_block
-    return resp
+
+
+# (parsed address key, node label, Address relationship) for /plaintiff/ingest
+_PLAINTIFF_ADDRESS_SPEC = (
+    ("subdistrict", "Subdistrict", "IN_SUBDISTRICT"),
+    ("district", "District", "IN_DISTRICT"),
+    ("province", "Province", "IN_PROVINCE"),
+    ("postal_code", "PostalCode", "HAS_POSTAL_CODE"),
+)
 
 
 @router.post("/plaintiff/ingest")
 def ingest_plaintiff_info(
     text: str = Query(..., min_length=1, description="ข้อความข้อมูลโจทก์และที่อยู่"),
-    case_id: Optional[str] = Query(None, description="ระบุ case_id ถ้าต้องการผูกเข้ากับคดีเฉพาะ")
+    case_id: Optional[str] = Query(None, description="ระบุ case_id ถ้าต้องการผูกเข้ากับคดีเฉพาะ"),
+    x_session_id: Optional[str] = Header(None),
 ):
     """Parse plaintiff person/address text and upsert person + address graph."""
-    setup_constraints()
+    ensure_constraints()
 
     info = parse_person_address(text)
 
@@ -770,36 +711,17 @@ def ingest_plaintiff_info(
     nodes.append(address)
     rels.append(SimpleRel(person, address, "RESIDES_AT"))
 
-    # Hierarchy: Subdistrict -> District -> Province
-    sd = info.get("subdistrict")
-    if sd:
-        sd_node = SimpleNode(sd, "Subdistrict")
-        nodes.append(sd_node)
-        rels.append(SimpleRel(address, sd_node, "IN_SUBDISTRICT"))
-
-    dist = info.get("district")
-    if dist:
-        dist_node = SimpleNode(dist, "District")
-        nodes.append(dist_node)
-        # link from address if no subdistrict
-        rels.append(SimpleRel(address, dist_node, "IN_DISTRICT"))
-
-    prov = info.get("province")
-    if prov:
-        prov_node = SimpleNode(prov, "Province")
-        nodes.append(prov_node)
-        rels.append(SimpleRel(address, prov_node, "IN_PROVINCE"))
-
-    # Postal code
-    pc = info.get("postal_code")
-    if pc:
-        pc_node = SimpleNode(pc, "PostalCode")
-        nodes.append(pc_node)
-        rels.append(SimpleRel(address, pc_node, "HAS_POSTAL_CODE"))
+    # Hierarchy (Subdistrict -> District -> Province) and postal code
+    for key, label, rel_type in _PLAINTIFF_ADDRESS_SPEC:
+        value = info.get(key)
+        if value:
+            node = SimpleNode(value, label)
+            nodes.append(node)
+            rels.append(SimpleRel(address, node, rel_type))
 
     gd = SimpleGraphDocument(nodes, rels)
     # Attach to provided case or latest
-    cid = (case_id or latest_case_id() or "PLAINTIFF-INFO").strip()
+    cid = (case_id or latest_case_id(x_session_id) or "PLAINTIFF-INFO").strip()
     upsert_graph([gd], cid)
 
     return {"case_id": cid, "parsed": info}
@@ -817,23 +739,13 @@ def search_court_documents_simple(
     suggestions: List[Dict] = []
 
     # Direct fuzzy matching over static list
-    for doc in COURT_DOCUMENTS:
-        title_score = fuzzy_match(q, doc["title"])
-        desc_score = fuzzy_match(q, doc["description"]) * 0.8
-        keyword_score = 0.0
-        for keyword in doc.get("keywords", []):
-            keyword_score = max(keyword_score, fuzzy_match(q, keyword))
-        keyword_score *= 0.9
-        final_score = max(title_score, desc_score, keyword_score)
-        if final_score > 0.1:  # Lower threshold for better results
-            suggestions.append({**doc, "score": final_score})
-
-    # Sort and return
-    suggestions.sort(key=lambda x: x.get("score", 0.0), reverse=True)
+    suggestions.extend(score_court_documents(q, 0.1))  # Lower threshold for better results
+
+    # Top k by score and return
     return {
         "query": q,
         "case_id": cid,
-        "results": suggestions[:k],
+        "results": heapq.nlargest(k, suggestions, key=lambda x: x.get("score", 0.0)),
         "total": len(suggestions),
         "source": "simple_search"
     }
@@ -843,7 +755,6 @@ def search_court_documents_simple(
 async def setup_thai_provinces():
     """Setup Thai provinces in Neo4j graph"""
     try:
-        from ..utils.thai_parser import upsert_thai_provinces
         upsert_thai_provinces()
         return {"message": "Thai provinces added successfully", "count": 77}
     except Exception as e:
@@ -13,6 +13,10 @@ NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "12345678")
 NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
 NEO4J_AUTH = (NEO4J_USER, NEO4J_PASSWORD)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))  # seconds
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))  # seconds
+NEO4J_WRITE_BATCH_SIZE = 10_000  # max UNWIND rows per write transaction
 
 # Ontology / Schema
 ALLOWED_NODE_LABELS = [
@@ -131,8 +135,20 @@ THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
 
 # TF-IDF configuration
 MAX_VOCAB_SIZE = 2048
+TFIDF_CACHE_SIZE = 32  # number of per-case indexes kept in memory
+SEARCH_CACHE_SIZE = 1024  # number of cached hybrid_search results
+SEARCH_CACHE_TTL = 60.0  # seconds a cached hybrid_search result stays valid
+FACTS_CACHE_SIZE = 256  # number of cached graph_retrieve results (same TTL)
+EMBED_CACHE_SIZE = 4096  # number of chunk embeddings kept in memory
+PARSE_CACHE_SIZE = 256  # per-parser cache of parsed step texts
+TOKENIZE_CACHE_SIZE = 8192  # number of tokenized texts (chunks and queries) kept in memory
+
+# Ingest configuration
+EXTRACT_PARALLEL_MIN_CHUNKS = 64  # extract across processes from this many chunks up
 
 # API configuration
 API_TITLE = "Neo Legal KG API"
 API_DESCRIPTION = "Thai legal KG with rule-based extraction and hybrid search"
 API_VERSION = "0.1.0"
+# Threadpool size for sync route handlers (defaults to the Neo4j pool size)
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", os.getenv("NEO4J_MAX_POOL_SIZE", "50")))
@@ -1,21 +1,33 @@
 """Main application entry point"""
 
+import threading
+from contextlib import suppress
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .config import API_TITLE, API_DESCRIPTION, API_VERSION
+from fastapi.responses import JSONResponse
+from .config import API_TITLE, API_DESCRIPTION, API_VERSION, API_THREADPOOL_SIZE
 from .api.routes import router
-from .services.neo4j_service import setup_constraints, upsert_graph, index_doc_chunks
-from .services.extraction import rule_based_extract, detect_case_id
+from .services.neo4j_service import setup_constraints, ensure_constraints, upsert_graph, index_doc_chunks, close_driver
+from .services.extraction import rule_based_extract, detect_case_id, shutdown_extract_pool
 from .services.search import hybrid_search, synthesize_answer
 from .models.graph import SimpleGraphDocument
 from typing import List
 
 
+# Optional faster JSON serialization (orjson) for all responses
+DefaultResponse = JSONResponse
+with suppress(ImportError):
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse
+    DefaultResponse = ORJSONResponse
+
 # Create FastAPI app
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
     version=API_VERSION,
+    default_response_class=DefaultResponse,
 )
 
 # Add CORS middleware
@@ -31,6 +43,36 @@ app.add_middleware(
 app.include_router(router, prefix="/api")
 
 
+@app.on_event("startup")
+async def init_threadpool():
+    """Size the threadpool that runs the sync (blocking Neo4j) route handlers"""
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
+
+def _init_constraints():
+    """Create Neo4j constraints, leaving them to /ingest if Neo4j is not ready"""
+    try:
+        if not ensure_constraints():
+            print("Constraint setup incomplete; /ingest retries via ensure_constraints()")
+    except Exception as e:
+        # Neo4j may not be up yet; /ingest retries via ensure_constraints()
+        print(f"Constraint setup deferred: {e}")
+
+
+@app.on_event("startup")
+def init_neo4j():
+    """Create Neo4j constraints in the background when the server starts"""
+    # Boot does not wait on Neo4j; an unreachable server only delays the constraints
+    threading.Thread(target=_init_constraints, name="neo4j-constraints", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def shutdown_neo4j():
+    """Release the shared Neo4j connection pool"""
+    close_driver()
+    shutdown_extract_pool()
+
+
 def main():
     """Run the example pipeline"""
     print("[KG] Minimal legal ontology pipeline (no vectors)")
@@ -87,10 +129,12 @@ def main():
 
     # Extract and collect graph docs
     all_docs: List[SimpleGraphDocument] = []
+    sections: List[str] = []
     for i, chunk in enumerate(text_chunks, 1):
         print(f"- Extracting chunk {i}")
         docs = rule_based_extract(chunk)
         all_docs.extend(docs)
+        sections.append(docs[0].section if docs else "")
 
     # Upsert to Neo4j (graph)
     print("- Upserting graph to Neo4j")
@@ -98,7 +142,7 @@ def main():
 
     # Index doc chunks (vector store metadata)
     print("- Indexing document chunks")
-    index_doc_chunks(text_chunks, case_id)
+    index_doc_chunks(text_chunks, case_id, sections)
 
     # Hybrid search demo
     query = "มาตรา 145 มีอะไรบ้าง"
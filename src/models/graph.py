@@ -5,6 +5,8 @@ from typing import List
 
 class SimpleNode:
     """Represents a node in the knowledge graph"""
+
+    __slots__ = ("id", "type")
     
     def __init__(self, id: str, type: str):
         self.id = id
@@ -13,6 +15,8 @@ class SimpleNode:
 
 class SimpleRel:
     """Represents a relationship between nodes in the knowledge graph"""
+
+    __slots__ = ("source", "target", "type")
     
     def __init__(self, source: SimpleNode, target: SimpleNode, type: str):
         self.source = source
@@ -23,6 +27,7 @@ class SimpleRel:
 class SimpleGraphDocument:
     """Represents a graph document containing nodes and relationships"""
     
-    def __init__(self, nodes: List[SimpleNode], relationships: List[SimpleRel]):
+    def __init__(self, nodes: List[SimpleNode], relationships: List[SimpleRel], section: str = ""):
         self.nodes = nodes
         self.relationships = relationships
+        self.section = section  # "มาตรา N" / "หมวด N" of the source chunk, if any
@@ -1,11 +1,67 @@
 """Rule-based text extraction service"""
 
+import os
 import re
 import hashlib
-from typing import List
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+from ..config import EXTRACT_PARALLEL_MIN_CHUNKS
 from ..models.graph import SimpleNode, SimpleRel, SimpleGraphDocument
 from ..utils.thai_parser import normalize_thai_digits, parse_thai_amount, parse_thai_date_iso
 
+# Literal keywords by category. They are matched together in one scan and each
+# hit reports its category via lastgroup, so adding a keyword is a table edit.
+_KEYWORD_CATEGORIES = {
+    "plaintiff": ("โจทก",),
+    "defendant": ("จำเลย",),
+    "employment": ("จ้าง", "เข้าทำงาน", "ลูกจ้าง", "ทำงาน"),
+    "baht": ("บาท",),
+    "fine": ("ปรับ",),
+    "compensation": ("ค่าชดเชย",),
+}
+_KEYWORD_RE = re.compile(
+    "|".join(
+        f"(?P<{cat}>" + "|".join(map(re.escape, sorted(kws, key=len, reverse=True))) + ")"
+        for cat, kws in _KEYWORD_CATEGORIES.items()
+    )
+)
+
+_ACT_RE = re.compile(r"((?:พระราชบัญญัติ|ประมวลกฎหมาย)[^\n]*?พ\.ศ\.?\s*\d{4})")
+_BOOK_RE = re.compile(r"ลักษณะ\s*([\d]+|[\u0E00-\u0E7F]+)")
+_TITLE_RE = re.compile(r"บท\s*([\u0E00-\u0E7F]+)")
+_CHAPTER_RE = re.compile(r"หมวด\s*(\d+)")
+_PART_RE = re.compile(r"ตอน(?:ที่)?\s*(\d+)")
+_SECTION_RE = re.compile(r"มาตรา\s*(\d+)(.*)")
+_SECTION_REF_RE = re.compile(r"มาตรา\s*(\d+)(?:\s*/\s*(\d+))?")
+_PARAGRAPH_RE = re.compile(r"วรรคที่\s*(\d+)")
+_INTEREST_RATE_RE = re.compile(r"ดอกเบี้ย(?:ร้อยละ)?\s*(\d+(?:\.\d+)?)\s*ต่อ\s*(ปี|เดือน)")
+_PENALTY_RE = re.compile(r"(เงินเพิ่ม|เบี้ยปรับ)[^\d%]*?(?:ร้อยละ)?\s*(\d+(?:\.\d+)?)")
+_TIME_PERIOD_RE = re.compile(r"(?:ทุก(?:ระยะเวลา)?\s*)(\d+|เจ็ด)\s*วัน")
+# Hierarchy keywords the capture regexes start with. One scan records where each
+# first occurs, so a capture regex only runs when its keyword is present, and from
+# there. No keyword overlaps another, so the scan sees every occurrence.
+_HEADER_RE = re.compile(
+    r"(?P<act>พระราชบัญญัติ|ประมวลกฎหมาย)|(?P<book>ลักษณะ)|(?P<title>บท)|(?P<chapter>หมวด)"
+    r"|(?P<part>ตอน)|(?P<section>มาตรา)|(?P<paragraph>วรรคที่)"
+)
+_HEADER_COUNT = _HEADER_RE.groups
+_CAUSE_RE = re.compile(r"(ไม่คืน[^,;\n]+|ไม่จ่าย[^,;\n]+)")
+# Case-number patterns in priority order: the first pattern found anywhere in a text wins
+_CASE_ID_PATTERNS = (
+    re.compile(r"คดีหมายเลข[ดำแดง]?\s*(?:ที่)?\s*([0-9/\-]+)"),
+    re.compile(r"หมายเลขคดี\s*([0-9/\-]+)"),
+    re.compile(r"คดี.*?([0-9]+/[0-9]+)"),
+)
+
+
+def _section_ref(m: "re.Match") -> str:
+    """Section number of a _SECTION_REF_RE match, normalized (120 / 1 -> 120/1)"""
+    no, sub = m.groups()
+    return no if sub is None else f"{no}/{sub}"
+
 
 def rule_based_extract(text: str) -> List[SimpleGraphDocument]:
     """Extract entities and relationships from text using rule-based approach"""
@@ -15,186 +71,200 @@ def rule_based_extract(text: str) -> List[SimpleGraphDocument]:
 
     def get_node(name: str, typ: str) -> SimpleNode:
         key = (name, typ)
-        if key not in index:
-            n = SimpleNode(name, typ)
-            index[key] = n
+        n = index.get(key)
+        if n is None:
+            n = index[key] = SimpleNode(name, typ)
             nodes.append(n)
-        return index[key]
+        return n
+
+    rel_keys = set()
+
+    def add_rel(source: SimpleNode, target: SimpleNode, typ: str):
+        # Nodes are unique per (name, type), so identity is a stable key
+        key = (id(source), id(target), typ)
+        if key not in rel_keys:
+            rel_keys.add(key)
+            rels.append(SimpleRel(source, target, typ))
 
     s = normalize_thai_digits(text)
 
+    hits = {m.lastgroup for m in _KEYWORD_RE.finditer(s)}
+
+    # First offset of each hierarchy keyword
+    header_at = {}
+    for m in _HEADER_RE.finditer(s):
+        header_at.setdefault(m.lastgroup, m.start())
+        if len(header_at) == _HEADER_COUNT:
+            break
+
+    def header_search(pattern: "re.Pattern", key: str):
+        return pattern.search(s, header_at[key]) if key in header_at else None
+
     # Parties
-    plaintiff = get_node("โจทก์", "Person") if re.search(r"โจทก(์)?", s) else None
-    defendant = get_node("จำเลย", "Person") if "จำเลย" in s else None
+    plaintiff = get_node("โจทก์", "Person") if "plaintiff" in hits else None
+    defendant = get_node("จำเลย", "Person") if "defendant" in hits else None
 
     # Employment
-    if any(kw in s for kw in ["จ้าง", "เข้าทำงาน", "ลูกจ้าง", "ทำงาน"]):
+    if "employment" in hits:
         contract = get_node("สัญญาจ้างงาน", "EmploymentContract")
         if plaintiff:
-            rels.append(SimpleRel(plaintiff, contract, "EMPLOYED_BY"))
+            add_rel(plaintiff, contract, "EMPLOYED_BY")
 
     # Money/Amounts
-    if "บาท" in s:
+    if "baht" in hits:
         amt = parse_thai_amount(s)
         if amt is not None:
             money = get_node(f"{int(amt):,} บาท", "MoneyAmount")
             term_name = "จำนวนเงิน"  # Generic amount
-            if "ปรับ" in s:
+            if "fine" in hits:
                 term_name = "ค่าปรับ"
-            elif "ค่าชดเชย" in s:
+            elif "compensation" in hits:
                 term_name = "ค่าชดเชย"
             
             term = get_node(term_name, "LegalTerm")
-            rels.append(SimpleRel(term, money, "HAS_AMOUNT"))
+            add_rel(term, money, "HAS_AMOUNT")
 
     # Dates
     iso = parse_thai_date_iso(s)
     if iso:
         date = get_node(iso, "Date")
         if plaintiff:
-            rels.append(SimpleRel(plaintiff, date, "OCCURRED_ON"))
+            add_rel(plaintiff, date, "OCCURRED_ON")
 
     # --- Legal structure: Act / Book / Title / Chapter / Part ---
     act = None
     # e.g., พระราชบัญญัติแรงงาน พ.ศ. 2541 / ประมวลกฎหมายอาญา พ.ศ. 2499
-    m_act = re.search(r"((?:พระราชบัญญัติ|ประมวลกฎหมาย)[^\n]*?พ\.ศ\.?\s*\d{4})", s)
+    m_act = header_search(_ACT_RE, "act")
     if m_act:
         act_name = m_act.group(1).strip()
         act = get_node(act_name, "Act")
 
     book = None
     # e.g., ลักษณะ 1, ลักษณะหนึ่ง
-    m_book = re.search(r"ลักษณะ\s*([\d]+|[\u0E00-\u0E7F]+)", s)
+    m_book = header_search(_BOOK_RE, "book")
     if m_book:
         book_no = m_book.group(1).strip()
         book = get_node(f"ลักษณะ {book_no}", "Book")
 
     title = None
     # e.g., บททั่วไป, บทกำหนดโทษ
-    m_title = re.search(r"บท\s*([\u0E00-\u0E7F]+)", s)
+    m_title = header_search(_TITLE_RE, "title")
     if m_title:
         title_name = m_title.group(1).strip()
         title = get_node(f"บท {title_name}", "Title")
 
     chapter = None
     # e.g., หมวด 16 บทกำหนดโทษ
-    m_chapter = re.search(r"หมวด\s*(\d+)", s)
+    m_chapter = header_search(_CHAPTER_RE, "chapter")
     if m_chapter:
         chapter_no = m_chapter.group(1)
         chapter = get_node(f"หมวด {chapter_no}", "Chapter")
 
     part = None
     # e.g., ตอน 1, ตอนที่ 2
-    m_part = re.search(r"ตอน(?:ที่)?\s*(\d+)", s)
+    m_part = header_search(_PART_RE, "part")
     if m_part:
         part_no = m_part.group(1)
         part = get_node(f"ตอน {part_no}", "Part")
 
     # --- Section + Section_desc ---
     section = None
-    m_section = re.search(r"มาตรา\s*(\d+)(.*)", s)
+    m_section = header_search(_SECTION_RE, "section")
     if m_section:
         sec_no = m_section.group(1)
         desc_text = m_section.group(2).strip()
         section = get_node(f"มาตรา {sec_no}", "Section")
         if desc_text:
             desc = get_node(desc_text, "Section_desc")
-            rels.append(SimpleRel(section, desc, "HAS_DESC"))
+            add_rel(section, desc, "HAS_DESC")
 
     # --- Wire hierarchy with BELONGS_TO (lowest -> highest) ---
     # Section -> Part/Chapter/Title/Book/Act
     if section:
         if part:
-            rels.append(SimpleRel(section, part, "BELONGS_TO"))
+            add_rel(section, part, "BELONGS_TO")
         elif chapter:
-            rels.append(SimpleRel(section, chapter, "BELONGS_TO"))
+            add_rel(section, chapter, "BELONGS_TO")
         elif title:
-            rels.append(SimpleRel(section, title, "BELONGS_TO"))
+            add_rel(section, title, "BELONGS_TO")
         elif book:
-            rels.append(SimpleRel(section, book, "BELONGS_TO"))
+            add_rel(section, book, "BELONGS_TO")
         elif act:
-            rels.append(SimpleRel(section, act, "BELONGS_TO"))
+            add_rel(section, act, "BELONGS_TO")
 
     # Part -> Chapter/Title/Book/Act
     if part:
         if chapter:
-            rels.append(SimpleRel(part, chapter, "BELONGS_TO"))
+            add_rel(part, chapter, "BELONGS_TO")
         elif title:
-            rels.append(SimpleRel(part, title, "BELONGS_TO"))
+            add_rel(part, title, "BELONGS_TO")
         elif book:
-            rels.append(SimpleRel(part, book, "BELONGS_TO"))
+            add_rel(part, book, "BELONGS_TO")
         elif act:
-            rels.append(SimpleRel(part, act, "BELONGS_TO"))
+            add_rel(part, act, "BELONGS_TO")
 
     # Chapter -> Title/Book/Act
     if chapter:
         if title:
-            rels.append(SimpleRel(chapter, title, "BELONGS_TO"))
+            add_rel(chapter, title, "BELONGS_TO")
         elif book:
-            rels.append(SimpleRel(chapter, book, "BELONGS_TO"))
+            add_rel(chapter, book, "BELONGS_TO")
         elif act:
-            rels.append(SimpleRel(chapter, act, "BELONGS_TO"))
+            add_rel(chapter, act, "BELONGS_TO")
 
     # Title -> Book/Act
     if title:
         if book:
-            rels.append(SimpleRel(title, book, "BELONGS_TO"))
+            add_rel(title, book, "BELONGS_TO")
         elif act:
-            rels.append(SimpleRel(title, act, "BELONGS_TO"))
+            add_rel(title, act, "BELONGS_TO")
 
     # Book -> Act
     if book and act:
-        rels.append(SimpleRel(book, act, "BELONGS_TO"))
+        add_rel(book, act, "BELONGS_TO")
 
     # Backward compatibility: Group (legacy) and link Section -> Group via SECTION
+    # (same หมวด match as the chapter)
     group = None
-    m_group = re.search(r"หมวด\s*(\d+)", s)
-    if m_group:
-        group_no = m_group.group(1)
-        group = get_node(f"หมวด {group_no}", "Group")
+    if m_chapter:
+        group = get_node(f"หมวด {chapter_no}", "Group")
     if group and section:
-        rels.append(SimpleRel(section, group, "SECTION"))
+        add_rel(section, group, "SECTION")
 
     # --- Paragraphs, Interest, Penalties, TimePeriods, Cross-refs ---
-    # Paragraph segmentation
-    paragraph_spans = []  # list of (para_no, start_idx, end_idx)
-    for m in re.finditer(r"วรรคที่\s*(\d+)", s):
-        try:
-            no = int(m.group(1))
-        except Exception:
-            continue
-        paragraph_spans.append((no, m.start(), None))
-    # Close spans
-    for i in range(len(paragraph_spans)):
-        no, start, _ = paragraph_spans[i]
-        end = paragraph_spans[i + 1][1] if i + 1 < len(paragraph_spans) else len(s)
-        paragraph_spans[i] = (no, start, end)
+    # Paragraph segmentation: each วรรคที่ N runs up to the next one (or the end)
+    para_marks = [
+        (int(m.group(1)), m.start())
+        for m in _PARAGRAPH_RE.finditer(s, header_at.get("paragraph", len(s)))
+    ]
+    para_ends = [start for _, start in para_marks[1:]] + [len(s)]
+    paragraph_spans = [(no, start, end) for (no, start), end in zip(para_marks, para_ends)]  # (para_no, start_idx, end_idx)
 
     # Helper to add InterestRate from text
     def extract_interest_rate(text_segment: str, owner_node: SimpleNode):
-        m_rate = re.search(r"ดอกเบี้ย(?:ร้อยละ)?\s*(\d+(?:\.\d+)?)\s*ต่อ\s*(ปี|เดือน)", text_segment)
+        m_rate = _INTEREST_RATE_RE.search(text_segment)
         if m_rate:
             rate_val = m_rate.group(1)
             period = m_rate.group(2)
             rate_node = get_node(f"{rate_val}% ต่อ{period}", "InterestRate")
-            rels.append(SimpleRel(owner_node, rate_node, "HAS_RATE"))
+            add_rel(owner_node, rate_node, "HAS_RATE")
 
     # Helper to add Penalty and TimePeriod from text
     def extract_penalty(text_segment: str, owner_node: SimpleNode):
-        m_pen = re.search(r"(เงินเพิ่ม|เบี้ยปรับ)[^\d%]*?(?:ร้อยละ)?\s*(\d+(?:\.\d+)?)", text_segment)
+        m_pen = _PENALTY_RE.search(text_segment)
         if m_pen:
             rate_val = m_pen.group(2)
             pen_node = get_node(f"เงินเพิ่ม {rate_val}%", "Penalty")
-            rels.append(SimpleRel(owner_node, pen_node, "HAS_PENALTY"))
+            add_rel(owner_node, pen_node, "HAS_PENALTY")
 
             # Time period e.g., ทุก 7 วัน / ทุกระยะเวลาเจ็ดวัน
-            m_tp = re.search(r"(?:ทุก(?:ระยะเวลา)?\s*)(\d+|เจ็ด)\s*วัน", text_segment)
+            m_tp = _TIME_PERIOD_RE.search(text_segment)
             if m_tp:
                 val = m_tp.group(1)
                 if val == "เจ็ด":
                     val = "7"
                 tp_node = get_node(f"ทุก {val} วัน", "TimePeriod")
-                rels.append(SimpleRel(pen_node, tp_node, "WITHIN"))
+                add_rel(pen_node, tp_node, "WITHIN")
 
     # If paragraphs exist, attach findings to each paragraph
     created_paragraphs = []
@@ -202,69 +272,131 @@ def rule_based_extract(text: str) -> List[SimpleGraphDocument]:
         for no, start, end in paragraph_spans:
             seg_text = s[start:end]
             para_node = get_node(f"วรรคที่ {no}", "Paragraph")
-            rels.append(SimpleRel(section, para_node, "HAS_PARAGRAPH"))
+            add_rel(section, para_node, "HAS_PARAGRAPH")
             created_paragraphs.append((para_node, seg_text))
             extract_interest_rate(seg_text, para_node)
             extract_penalty(seg_text, para_node)
             # Extract causes per paragraph
             # Examples: ไม่คืนหลักประกัน, ไม่จ่ายค่าจ้าง, ไม่จ่ายเงินกรณี..., ไม่จ่ายเงิน...ตามมาตรา xx
-            for m_cause in re.finditer(r"(ไม่คืน[^,;\n]+|ไม่จ่าย[^,;\n]+)", seg_text):
+            for m_cause in _CAUSE_RE.finditer(seg_text):
                 cause_text = m_cause.group(1).strip()
                 cause_node = get_node(cause_text, "Cause")
-                rels.append(SimpleRel(para_node, cause_node, "HAS_CAUSE"))
+                add_rel(para_node, cause_node, "HAS_CAUSE")
                 # Cross-refs inside cause
-                for m_ref in re.finditer(r"มาตรา\s*(\d+(?:\s*/\s*\d+)?)", cause_text):
-                    ref_raw = m_ref.group(1)
-                    ref_norm = re.sub(r"\s*/\s*", "/", ref_raw)
-                    ref_node = get_node(f"มาตรา {ref_norm}", "Section")
-                    rels.append(SimpleRel(cause_node, ref_node, "REFERS_TO"))
+                for m_ref in _SECTION_REF_RE.finditer(cause_text):
+                    ref_node = get_node(f"มาตรา {_section_ref(m_ref)}", "Section")
+                    add_rel(cause_node, ref_node, "REFERS_TO")
     else:
         # Fallback: attach to section
         if section:
             extract_interest_rate(s, section)
             extract_penalty(s, section)
-            for m_cause in re.finditer(r"(ไม่คืน[^,;\n]+|ไม่จ่าย[^,;\n]+)", s):
+            for m_cause in _CAUSE_RE.finditer(s):
                 cause_text = m_cause.group(1).strip()
                 cause_node = get_node(cause_text, "Cause")
-                rels.append(SimpleRel(section, cause_node, "HAS_CAUSE"))
-                for m_ref in re.finditer(r"มาตรา\s*(\d+(?:\s*/\s*\d+)?)", cause_text):
-                    ref_raw = m_ref.group(1)
-                    ref_norm = re.sub(r"\s*/\s*", "/", ref_raw)
-                    ref_node = get_node(f"มาตรา {ref_norm}", "Section")
-                    rels.append(SimpleRel(cause_node, ref_node, "REFERS_TO"))
+                add_rel(section, cause_node, "HAS_CAUSE")
+                for m_ref in _SECTION_REF_RE.finditer(cause_text):
+                    ref_node = get_node(f"มาตรา {_section_ref(m_ref)}", "Section")
+                    add_rel(cause_node, ref_node, "REFERS_TO")
 
     # Cross-referenced sections: มาตรา 10, มาตรา 17/1, 120 / 1, etc.
     if section:
-        current_no_match = re.search(r"มาตรา\s*(\d+)", s)
-        current_no = current_no_match.group(1) if current_no_match else None
-        for m in re.finditer(r"มาตรา\s*(\d+(?:\s*/\s*\d+)?)", s):
-            ref_raw = m.group(1)
-            # Normalize 120 / 1 -> 120/1
-            ref_norm = re.sub(r"\s*/\s*", "/", ref_raw)
+        current_no = sec_no
+        for m in _SECTION_REF_RE.finditer(s):
+            ref_norm = _section_ref(m)
             # Skip self-reference
             if current_no and ref_norm == current_no:
                 continue
             ref_node = get_node(f"มาตรา {ref_norm}", "Section")
-            rels.append(SimpleRel(section, ref_node, "REFERS_TO"))
+            add_rel(section, ref_node, "REFERS_TO")
+
+    # Chunk-level section label (reused as DocChunk.section at indexing time)
+    if m_section:
+        chunk_section = f"มาตรา {m_section.group(1)}"
+    elif m_chapter:
+        chunk_section = f"หมวด {m_chapter.group(1)}"
+    else:
+        chunk_section = ""
 
-    return [SimpleGraphDocument(nodes, rels)]
+    return [SimpleGraphDocument(nodes, rels, chunk_section)]
+
+
+_EXTRACT_POOL: Optional[ProcessPoolExecutor] = None
+_EXTRACT_POOL_LOCK = threading.Lock()
+
+
+def _extract_pool() -> ProcessPoolExecutor:
+    """Process pool for large ingests, created on first use"""
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is None:
+            # Never fork the threaded API process: children could inherit locks
+            # held by other threads (logging, the Neo4j driver) and deadlock
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _EXTRACT_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=ctx)
+        return _EXTRACT_POOL
+
+
+def _discard_extract_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next large batch starts a fresh one"""
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is pool:
+            _EXTRACT_POOL = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_extract_pool() -> None:
+    """Stop the extraction worker processes, if any were started"""
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is not None:
+            _EXTRACT_POOL.shutdown()
+            _EXTRACT_POOL = None
+
+
+def rule_based_extract_batch(chunks: List[str]) -> List[SimpleGraphDocument]:
+    """Extract one graph document per chunk (aligned with ``chunks``)
+
+    Small batches run inline; from EXTRACT_PARALLEL_MIN_CHUNKS chunks up the
+    regex work is spread over a process pool, where it outweighs the pickling.
+    """
+    docs: List[SimpleGraphDocument] = []
+    if len(chunks) < EXTRACT_PARALLEL_MIN_CHUNKS:
+        for chunk in chunks:
+            docs.extend(rule_based_extract(chunk))
+        return docs
+    pool = _extract_pool()
+    try:
+        workers = os.cpu_count() or 1
+        chunksize = max(1, len(chunks) // (workers * 4))
+        for chunk_docs in pool.map(rule_based_extract, chunks, chunksize=chunksize):
+            docs.extend(chunk_docs)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            _discard_extract_pool(pool)
+        print(f"Parallel extract warn, falling back to sequential: {e}")
+        docs = []
+        for chunk in chunks:
+            docs.extend(rule_based_extract(chunk))
+    return docs
 
 
 def detect_case_id(texts: List[str]) -> str:
     """Detect or generate case ID from text chunks"""
-    pats = [
-        r"คดีหมายเลข[ดำแดง]?\s*(ที่)?\s*([0-9/\-]+)",
-        r"หมายเลขคดี\s*([0-9/\-]+)",
-        r"คดี.*?([0-9]+/[0-9]+)",
-    ]
-    
     for t in texts:
-        for p in pats:
-            m = re.search(p, t)
+        for pattern in _CASE_ID_PATTERNS:
+            m = pattern.search(t)
             if m:
-                num = m.group(m.lastindex) if m.lastindex else m.group(0)
-                return f"CASE-{num}".replace(" ", "")
+                return f"CASE-{m.group(1)}".replace(" ", "")
     
     # Generate hash-based ID if no case number found
-    h = hashlib.sha1("\n".join(texts).encode("utf-8")).hexdigest()[:10]
-    return f"CASE-{h}"
+    # Same digest as sha1("\n".join(texts)) without building the joined copy; the id is
+    # a persistent MERGE key, so the hash must not change
+    h = hashlib.sha1()
+    for i, t in enumerate(texts):
+        if i:
+            h.update(b"\n")
+        h.update(t.encode("utf-8"))
+    return f"CASE-{h.hexdigest()[:10]}"
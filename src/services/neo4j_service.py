@@ -1,16 +1,50 @@
 """Neo4j database operations service"""
 
+import atexit
 import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 
-from ..config import NEO4J_URI, NEO4J_AUTH, NEO4J_DATABASE, ALLOWED_NODE_LABELS
+from ..config import (
+    NEO4J_URI, NEO4J_AUTH, NEO4J_DATABASE, NEO4J_MAX_POOL_SIZE, NEO4J_MAX_CONNECTION_LIFETIME,
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+    NEO4J_WRITE_BATCH_SIZE,
+    ALLOWED_NODE_LABELS,
+)
 from ..models.graph import SimpleNode, SimpleRel, SimpleGraphDocument
 from ..utils.thai_parser import sanitize_label, sanitize_rel_type, normalize_thai_digits
 
+_SECTION_NO_RE = re.compile(r"มาตรา\s*(\d+)")
+_GROUP_NO_RE = re.compile(r"หมวด\s*(\d+)")
 
-def setup_constraints():
-    """Create uniqueness constraints in Neo4j"""
+# Shared driver; its connection pool is reused by every session in the process
+DRIVER = GraphDatabase.driver(
+    NEO4J_URI,
+    auth=NEO4J_AUTH,
+    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+    max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+    connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+)
+
+
+def close_driver():
+    """Close the shared Neo4j driver and its connection pool"""
+    DRIVER.close()
+
+
+# Scripts (e.g. the demo in main.py) exit without the API shutdown hook
+atexit.register(close_driver)
+
+
+def setup_constraints() -> bool:
+    """Create uniqueness constraints in Neo4j; True only if every statement succeeded.
+
+    Raises ServiceUnavailable/SessionExpired when Neo4j cannot be reached.
+    """
     stmts = [
         "CREATE CONSTRAINT uniq_person_name IF NOT EXISTS FOR (n:Person) REQUIRE n.name IS UNIQUE",
         "CREATE CONSTRAINT uniq_company_name IF NOT EXISTS FOR (n:Company) REQUIRE n.name IS UNIQUE",
@@ -62,13 +96,54 @@ def setup_constraints():
         "CREATE CONSTRAINT uniq_labor_law IF NOT EXISTS FOR (n:LaborLaw) REQUIRE n.id IS UNIQUE",
     ]
     
-    with GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH) as driver:
-        with driver.session(database=NEO4J_DATABASE) as session:
+    def _create_all(tx):
+        for q in stmts:
+            tx.run(q)
+
+    # Fail fast on a dead server instead of sitting in execute_write's retry loop
+    DRIVER.verify_connectivity()
+    with DRIVER.session(database=NEO4J_DATABASE) as session:
+        try:
+            # All statements are idempotent; send them in one transaction
+            session.execute_write(_create_all)
+            return True
+        except (ServiceUnavailable, SessionExpired):
+            raise
+        except Exception:
+            # Fall back to one statement at a time so a single failure is isolated
+            ok = True
             for q in stmts:
                 try:
                     session.run(q)
+                except (ServiceUnavailable, SessionExpired):
+                    raise
                 except Exception as e:
                     print(f"Constraint warn: {e}")
+                    ok = False
+            return ok
+
+
+_CONSTRAINTS_READY = False
+_CONSTRAINTS_LOCK = threading.Lock()
+
+
+def ensure_constraints() -> bool:
+    """Run setup_constraints until it succeeds once per process; later calls are no-ops.
+
+    A caller that finds the setup already running in another thread returns False
+    instead of queueing behind its network I/O.
+    """
+    global _CONSTRAINTS_READY
+    if _CONSTRAINTS_READY:
+        return True
+    if not _CONSTRAINTS_LOCK.acquire(blocking=False):
+        return False
+    try:
+        if not _CONSTRAINTS_READY:
+            _CONSTRAINTS_READY = setup_constraints()
+        return _CONSTRAINTS_READY
+    finally:
+        _CONSTRAINTS_LOCK.release()
 
 
 def map_node(node: SimpleNode) -> Tuple[str, Dict]:
@@ -92,211 +167,363 @@ def map_node(node: SimpleNode) -> Tuple[str, Dict]:
     return sanitize_label(label), props
 
 
-def upsert_graph(graph_docs: List[SimpleGraphDocument], case_id: str):
-    """Upsert graph documents to Neo4j"""
+@lru_cache(maxsize=None)
+def _node_merge_query(label: str) -> str:
+    """UNWIND MERGE query for one (sanitized, whitelisted) node label"""
+    return f"UNWIND $rows AS row MERGE (n:`{label}` {{name: row.name}}) SET n += row.props"
+
+
+@lru_cache(maxsize=None)
+def _rel_merge_query(s_label: str, r_type: str, t_label: str) -> str:
+    """UNWIND MERGE query for one (source label, rel type, target label) shape"""
+    return (
+        f"UNWIND $rows AS row "
+        f"MATCH (a:`{s_label}` {{name: row.s}}), (b:`{t_label}` {{name: row.t}}) "
+        f"MERGE (a)-[:`{r_type}`]->(b)"
+    )
+
+
+def _write_batched(session, query: str, rows: Optional[list], **params):
+    """Run an UNWIND $rows write query in managed transactions of at most NEO4J_WRITE_BATCH_SIZE rows.
+
+    ``rows=None`` marks a plain parameterised statement, run once as is.
+    """
+    if rows is None:
+        session.execute_write(lambda tx: tx.run(query, **params).consume())
+        return
+    for i in range(0, len(rows), NEO4J_WRITE_BATCH_SIZE):
+        batch = rows[i:i + NEO4J_WRITE_BATCH_SIZE]
+        session.execute_write(lambda tx: tx.run(query, rows=batch, **params).consume())
+
+
+def _graph_writes(graph_docs: List[SimpleGraphDocument], case_id: str) -> List[Tuple[str, str, Optional[list], dict]]:
+    """Plan the batched writes of upsert_graph as (warn label, query, rows or None, params)"""
     nodes = {}
     rels = []
     roles = []  # (person_name, role_value)
+    by_label: Dict[str, set] = defaultdict(set)
+    mapped: Dict[int, Tuple[str, Dict]] = {}  # id(SimpleNode) -> map_node result
+
+    def _mapped(n: SimpleNode) -> Tuple[str, Dict]:
+        mm = mapped.get(id(n))
+        if mm is None:
+            mm = mapped[id(n)] = map_node(n)
+        return mm
 
     for gd in graph_docs:
         for n in gd.nodes:
-            label, props = map_node(n)
+            label, props = _mapped(n)
             key = (label, props["name"])
             if key not in nodes:
-                nodes[key] = props
+                nodes[key] = dict(props)
+                by_label[label].add(props["name"])
             else:
                 nodes[key].update({k: v for k, v in props.items() if v})
             if label == "Person" and props.get("_role_hint"):
                 roles.append((props["name"], props["_role_hint"]))
 
         for r in gd.relationships:
-            s_label, s_props = map_node(r.source)
-            t_label, t_props = map_node(r.target)
+            s_label, s_props = _mapped(r.source)
+            t_label, t_props = _mapped(r.target)
             r_type = sanitize_rel_type(r.type)
             rels.append((s_label, s_props["name"], r_type, t_label, t_props["name"]))
 
-    with GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH) as driver:
-        with driver.session(database=NEO4J_DATABASE) as session:
-            # Ensure the case node exists
-            session.run(
-                "MERGE (c:CourtCase {caseId: $cid}) SET c.name = coalesce(c.name, $cid)",
-                cid=case_id,
+    # Group rows by query shape so each shape is sent once via UNWIND
+    node_rows: Dict[str, List[dict]] = {}
+    for (label, name), props in nodes.items():
+        props = {k: v for k, v in props.items() if not k.startswith("_")}
+        node_rows.setdefault(label, []).append({"name": name, "props": props})
+
+    rel_rows: Dict[Tuple[str, str, str], List[dict]] = {}
+    for s_label, s_name, r_type, t_label, t_name in rels:
+        rel_rows.setdefault((s_label, r_type, t_label), []).append({"s": s_name, "t": t_name})
+
+    role_rows = [{"p": p, "v": v} for p, v in dict.fromkeys(roles)]
+    plaintiff_names = [row["p"] for row in role_rows if row["v"] == "Plaintiff"]
+    money_names = sorted(by_label.get("MoneyAmount", ()))
+    date_names = sorted(by_label.get("Date", ()))
+
+    cid = {"cid": case_id}
+    # Ensure the case node exists
+    writes = [("", "MERGE (c:CourtCase {caseId: $cid}) SET c.name = coalesce(c.name, $cid)", None, cid)]
+    # Upsert nodes, one batch per label
+    for label, rows in node_rows.items():
+        writes.append((f"Node upsert warn [{label} x{len(rows)}]", _node_merge_query(label), rows, {}))
+    # Upsert relationships, one batch per (source label, type, target label)
+    for (s_label, r_type, t_label), rows in rel_rows.items():
+        writes.append((
+            f"Rel upsert warn [{s_label} -{r_type}-> {t_label} x{len(rows)}]",
+            _rel_merge_query(s_label, r_type, t_label),
+            rows,
+            {},
+        ))
+    if role_rows:
+        # Create LegalRole nodes + HAS_ROLE edges
+        writes.append((
+            "HAS_ROLE warn",
+            "UNWIND $rows AS row "
+            "MERGE (r:LegalRole {value: row.v, name: row.v}) "
+            "WITH row, r MATCH (p:Person {name: row.p}) MERGE (p)-[:HAS_ROLE]->(r)",
+            role_rows,
+            {},
+        ))
+        # Link parties to the case; plaintiffs also CLAIM the case
+        writes.append((
+            "Case link warn",
+            "UNWIND $rows AS pname "
+            "MATCH (p:Person {name: pname}), (c:CourtCase {caseId: $cid}) MERGE (p)-[:PARTY]->(c)",
+            [row["p"] for row in role_rows],
+            cid,
+        ))
+        if plaintiff_names:
+            writes.append((
+                "Case link warn",
+                "UNWIND $rows AS pname "
+                "MATCH (p:Person {name: pname}), (c:CourtCase {caseId: $cid}) MERGE (p)-[:CLAIMS]->(c)",
+                plaintiff_names,
+                cid,
+            ))
+    # Link the case to observed MoneyAmount and Date nodes (case-scoped facts)
+    if money_names:
+        writes.append((
+            "Case link amounts/dates warn",
+            "MATCH (c:CourtCase {caseId: $cid}) "
+            "UNWIND $rows AS mname MERGE (m:MoneyAmount {name: mname}) MERGE (c)-[:HAS_AMOUNT]->(m)",
+            money_names,
+            cid,
+        ))
+    if date_names:
+        writes.append((
+            "Case link amounts/dates warn",
+            "MATCH (c:CourtCase {caseId: $cid}) "
+            "UNWIND $rows AS dname MERGE (d:Date {name: dname}) MERGE (c)-[:OCCURRED_ON]->(d)",
+            date_names,
+            cid,
+        ))
+    return writes
+
+
+def _run_writes(session, writes: List[Tuple[str, str, Optional[list], dict]]):
+    """Run planned writes one batch at a time; failures of labelled writes are only reported"""
+    for warn, q, rows, params in writes:
+        if not warn:
+            _write_batched(session, q, rows, **params)
+            continue
+        try:
+            _write_batched(session, q, rows, **params)
+        except Exception as e:
+            print(f"{warn}: {e}")
+
+
+def _run_writes_in_one_tx(session, writes: List[Tuple[str, str, Optional[list], dict]], what: str):
+    """Run planned writes in a single write transaction (one round-trip commit).
+
+    Falls back to _run_writes (batch by batch, with warnings) if it fails.
+    """
+    def _write_all(tx):
+        for _, q, rows, params in writes:
+            if rows is None:
+                tx.run(q, **params).consume()
+                continue
+            for i in range(0, len(rows), NEO4J_WRITE_BATCH_SIZE):
+                tx.run(q, rows=rows[i:i + NEO4J_WRITE_BATCH_SIZE], **params).consume()
+
+    try:
+        session.execute_write(_write_all)
+    except Exception as e:
+        print(f"Combined {what} write warn, retrying per batch: {e}")
+        _run_writes(session, writes)
+
+
+def _invalidate_search_caches(case_id: str, chunks: bool = False):
+    """Drop the case's cached search results and facts after a write (and its TF-IDF index if chunks changed)"""
+    # Local import: search imports this module
+    from .search import invalidate_tfidf_cache, invalidate_search_results
+    if chunks:
+        invalidate_tfidf_cache(case_id)
+    else:
+        invalidate_search_results(case_id)
+
+
+def upsert_graph(graph_docs: List[SimpleGraphDocument], case_id: str):
+    """Upsert graph documents to Neo4j in a single write transaction"""
+    writes = _graph_writes(graph_docs, case_id)
+    try:
+        with DRIVER.session(database=NEO4J_DATABASE) as session:
+            _run_writes_in_one_tx(session, writes, "graph")
+    finally:
+        _invalidate_search_caches(case_id)
+
+
+def chunk_section(text: str) -> str:
+    """Return the first "มาตรา N" (or else "หมวด N") reference in a chunk"""
+    m_sec = _SECTION_NO_RE.search(text)
+    if m_sec:
+        return f"มาตรา {normalize_thai_digits(m_sec.group(1))}"
+    m_grp = _GROUP_NO_RE.search(text)
+    if m_grp:
+        return f"หมวด {normalize_thai_digits(m_grp.group(1))}"
+    return ""
+
+
+def _chunk_write(text_chunks: List[str], case_id: str, sections: Optional[List[str]]) -> Tuple[str, str, Optional[list], dict]:
+    """Plan the DocChunk MERGE for a case's chunks"""
+    if sections is None:
+        sections = [chunk_section(text) for text in text_chunks]
+    rows = [
+        {"id": f"{case_id}-{i}", "text": text, "page": i, "section": sec}
+        for i, (text, sec) in enumerate(zip(text_chunks, sections), 1)
+    ]
+    return (
+        "",
+        "UNWIND $rows AS row "
+        "MERGE (d:DocChunk {caseId: $cid, chunkId: row.id}) "
+        "SET d.text = row.text, d.page = row.page, d.section = row.section, "
+        "d.updatedAt = timestamp()",
+        rows,
+        {"cid": case_id},
+    )
+
+
+def index_doc_chunks(text_chunks: List[str], case_id: str, sections: Optional[List[str]] = None):
+    """Index document chunks in Neo4j for vector store metadata.
+
+    ``sections`` may carry the per-chunk section labels already found during
+    extraction; otherwise they are detected here.
+    """
+    try:
+        with DRIVER.session(database=NEO4J_DATABASE) as session:
+            _run_writes(session, [_chunk_write(text_chunks, case_id, sections)])
+    finally:
+        _invalidate_search_caches(case_id, chunks=True)
+
+
+def upsert_graph_and_chunks(
+    graph_docs: List[SimpleGraphDocument],
+    text_chunks: List[str],
+    case_id: str,
+    sections: Optional[List[str]] = None,
+):
+    """Upsert graph documents and index their chunks in a single write transaction.
+
+    Falls back to upsert_graph + index_doc_chunks (batch by batch, with
+    warnings) if the combined transaction fails.
+    """
+    writes = _graph_writes(graph_docs, case_id)
+    writes.append(_chunk_write(text_chunks, case_id, sections))
+    try:
+        with DRIVER.session(database=NEO4J_DATABASE) as session:
+            _run_writes_in_one_tx(session, writes, "ingest")
+    finally:
+        _invalidate_search_caches(case_id, chunks=True)
+
+
+DOC_CHUNK_FIELDS = ("caseId", "chunkId", "text", "page", "section")
+
+
+def _read_records(session, query: str, **params) -> list:
+    """Run a read query in a managed read transaction and return its records"""
+    return session.execute_read(lambda tx: list(tx.run(query, **params)))
+
+
+def fetch_doc_chunks(case_id: Optional[str] = None) -> List[tuple]:
+    """Fetch document chunks from Neo4j as tuples ordered like DOC_CHUNK_FIELDS"""
+    with DRIVER.session(database=NEO4J_DATABASE) as session:
+        if case_id:
+            q = (
+                "MATCH (d:DocChunk {caseId: $cid}) "
+                "RETURN d.caseId AS caseId, d.chunkId AS chunkId, d.text AS text, "
+                "d.page AS page, coalesce(d.section, '') AS section "
+                "ORDER BY d.page ASC"
             )
+            res = _read_records(session, q, cid=case_id)
+        else:
+            q = (
+                "MATCH (d:DocChunk) "
+                "RETURN d.caseId AS caseId, d.chunkId AS chunkId, d.text AS text, "
+                "d.page AS page, coalesce(d.section, '') AS section "
+                "ORDER BY d.caseId, d.page ASC"
+            )
+            res = _read_records(session, q)
+        return [tuple(r) for r in res]
 
-            # Upsert nodes
-            for (label, name), props in nodes.items():
-                props = {k: v for k, v in props.items() if not k.startswith("_")}
-                q = f"MERGE (n:`{label}` {{name: $name}}) SET n += $props"
-                try:
-                    session.run(q, name=name, props=props)
-                except Exception as e:
-                    print(f"Node upsert warn [{label}:{name}]: {e}")
-
-            # Upsert relationships
-            for s_label, s_name, r_type, t_label, t_name in rels:
-                q = (
-                    f"MATCH (a:`{s_label}` {{name: $sname}}), (b:`{t_label}` {{name: $tname}}) "
-                    f"MERGE (a)-[:`{r_type}`]->(b)"
-                )
-                try:
-                    session.run(q, sname=s_name, tname=t_name)
-                except Exception as e:
-                    print(f"Rel upsert warn [{s_label}:{s_name} -{r_type}-> {t_label}:{t_name}]: {e}")
 
-            # Create LegalRole nodes + HAS_ROLE edges
-            for person_name, role_value in roles:
-                try:
-                    session.run("MERGE (r:LegalRole {value: $v, name: $v})", v=role_value)
-                    session.run(
-                        "MATCH (p:Person {name: $p}), (r:LegalRole {value: $v}) MERGE (p)-[:HAS_ROLE]->(r)",
-                        p=person_name,
-                        v=role_value,
-                    )
-                except Exception as e:
-                    print(f"HAS_ROLE warn [{person_name}->{role_value}]: {e}")
+def doc_chunks_fingerprint(case_id: Optional[str] = None) -> Tuple[int, Optional[int]]:
+    """Return (chunk count, last updatedAt) as a cheap change marker for a case's chunks.
 
-            # Link parties to the case; plaintiffs also CLAIM the case
-            for person_name, role_value in roles:
-                try:
-                    session.run(
-                        "MATCH (p:Person {name: $p}), (c:CourtCase {caseId: $cid}) MERGE (p)-[:PARTY]->(c)",
-                        p=person_name,
-                        cid=case_id,
-                    )
-                    if role_value == "Plaintiff":
-                        session.run(
-                            "MATCH (p:Person {name: $p}), (c:CourtCase {caseId: $cid}) MERGE (p)-[:CLAIMS]->(c)",
-                            p=person_name,
-                            cid=case_id,
-                        )
-                except Exception as e:
-                    print(f"Case link warn [{person_name}]: {e}")
-
-            # Link the case to observed MoneyAmount and Date nodes (case-scoped facts)
-            try:
-                money_names = [props["name"] for (label, _name), props in nodes.items() if label == "MoneyAmount"]
-                for mname in set(money_names):
-                    session.run(
-                        "MATCH (c:CourtCase {caseId: $cid}) MERGE (m:MoneyAmount {name: $m}) MERGE (c)-[:HAS_AMOUNT]->(m)",
-                        cid=case_id,
-                        m=mname,
-                    )
-                date_names = [props["name"] for (label, _name), props in nodes.items() if label == "Date"]
-                for dname in set(date_names):
-                    session.run(
-                        "MATCH (c:CourtCase {caseId: $cid}) MERGE (d:Date {name: $d}) MERGE (c)-[:OCCURRED_ON]->(d)",
-                        cid=case_id,
-                        d=dname,
-                    )
-            except Exception as e:
-                print(f"Case link amounts/dates warn: {e}")
-
-
-def index_doc_chunks(text_chunks: List[str], case_id: str):
-    """Index document chunks in Neo4j for vector store metadata"""
-    with GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH) as driver:
-        with driver.session(database=NEO4J_DATABASE) as session:
-            for i, text in enumerate(text_chunks, 1):
-                sec = ""
-                m_sec = re.search(r"มาตรา\s*(\d+)", text)
-                if m_sec:
-                    sec = f"มาตรา {m_sec.group(1)}"
-                else:
-                    m_grp = re.search(r"หมวด\s*(\d+)", text)
-                    if m_grp:
-                        sec = f"หมวด {m_grp.group(1)}"
-
-                session.run(
-                    "MERGE (d:DocChunk {caseId: $cid, chunkId: $id}) "
-                    "SET d.text = $text, d.page = $page, d.section = $section",
-                    cid=case_id,
-                    id=f"{case_id}-{i}",
-                    text=text,
-                    page=i,
-                    section=sec,
-                )
-
-
-def fetch_doc_chunks(case_id: Optional[str] = None) -> List[dict]:
-    """Fetch document chunks from Neo4j"""
-    with GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH) as driver:
-        with driver.session(database=NEO4J_DATABASE) as session:
-            if case_id:
-                q = (
-                    "MATCH (d:DocChunk {caseId: $cid}) "
-                    "RETURN d.caseId AS caseId, d.chunkId AS chunkId, d.text AS text, "
-                    "d.page AS page, coalesce(d.section, '') AS section "
-                    "ORDER BY d.page ASC"
-                )
-                res = session.run(q, cid=case_id)
-            else:
-                q = (
-                    "MATCH (d:DocChunk) "
-                    "RETURN d.caseId AS caseId, d.chunkId AS chunkId, d.text AS text, "
-                    "d.page AS page, coalesce(d.section, '') AS section "
-                    "ORDER BY d.caseId, d.page ASC"
-                )
-                res = session.run(q)
-            return [r.data() for r in res]
+    Chunk ids repeat when a case is re-ingested, so the write timestamp is what
+    tells a new version apart (also across API worker processes).
+    """
+    with DRIVER.session(database=NEO4J_DATABASE) as session:
+        if case_id:
+            q = "MATCH (d:DocChunk {caseId: $cid}) RETURN count(d) AS n, max(d.updatedAt) AS last"
+            res = _read_records(session, q, cid=case_id)
+        else:
+            q = "MATCH (d:DocChunk) RETURN count(d) AS n, max(d.updatedAt) AS last"
+            res = _read_records(session, q)
+        if not res:
+            return 0, None
+        return res[0]["n"], res[0]["last"]
 
 
 def graph_retrieve(case_id: Optional[str] = None, limit: int = 20) -> List[dict]:
     """Retrieve graph facts from Neo4j"""
-    with GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH) as driver:
-        with driver.session() as session:
-            if case_id:
-                # 1) Original facts
-                q_facts = """
-                MATCH (c:CourtCase {caseId: $cid})
-                OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
-                OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
-                OPTIONAL MATCH (c)-[:OCCURRED_ON]->(d:Date)
-                OPTIONAL MATCH (c)-[:HAS_AMOUNT]->(m:MoneyAmount)
-                OPTIONAL MATCH (sec:Section)-[:HAS_DESC]->(desc:Section_desc)
-                RETURN DISTINCT 
-                    p.name AS person, role.value AS role, c.caseId AS caseId,
-                    d.name AS date, m.name AS amount,
-                    sec.name AS section, desc.name AS section_desc
-                LIMIT $limit
-                """
-                facts_res = session.run(q_facts, cid=case_id, limit=limit)
-                facts = [r.data() for r in facts_res]
-
-                # 2) Plaintiff + Address (append to facts)
-                q_plaintiff = """
-                MATCH (c:CourtCase {caseId: $cid})
-                OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
-                OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
-                OPTIONAL MATCH (p)-[:RESIDES_AT]->(addr:Address)
-                OPTIONAL MATCH (addr)-[:IN_SUBDISTRICT]->(sd:Subdistrict)
-                OPTIONAL MATCH (addr)-[:IN_DISTRICT]->(dist:District)
-                OPTIONAL MATCH (addr)-[:IN_PROVINCE]->(prov:Province)
-                OPTIONAL MATCH (addr)-[:HAS_POSTAL_CODE]->(pc:PostalCode)
-                WHERE p IS NOT NULL AND (role.value = 'Plaintiff' OR role.value IS NULL)
-                RETURN DISTINCT 
-                    p.name AS person, role.value AS role, c.caseId AS caseId,
-                    NULL AS date, NULL AS amount,
-                    NULL AS section, NULL AS section_desc,
-                    addr.name AS address, sd.name AS subdistrict, dist.name AS district, prov.name AS province, pc.code AS postal_code
-                LIMIT 1
-                """
-                pl_res = session.run(q_plaintiff, cid=case_id)
-                facts.extend([r.data() for r in pl_res])
+    with DRIVER.session(database=NEO4J_DATABASE) as session:
+        if case_id:
+            # 1) Original facts
+            q_facts = """
+            MATCH (c:CourtCase {caseId: $cid})
+            OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
+            OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
+            OPTIONAL MATCH (c)-[:OCCURRED_ON]->(d:Date)
+            OPTIONAL MATCH (c)-[:HAS_AMOUNT]->(m:MoneyAmount)
+            OPTIONAL MATCH (sec:Section)-[:HAS_DESC]->(desc:Section_desc)
+            RETURN DISTINCT 
+                p.name AS person, role.value AS role, c.caseId AS caseId,
+                d.name AS date, m.name AS amount,
+                sec.name AS section, desc.name AS section_desc
+            LIMIT $limit
+            """
+
+            # 2) Plaintiff + Address (append to facts)
+            q_plaintiff = """
+            MATCH (c:CourtCase {caseId: $cid})
+            OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
+            OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
+            OPTIONAL MATCH (p)-[:RESIDES_AT]->(addr:Address)
+            OPTIONAL MATCH (addr)-[:IN_SUBDISTRICT]->(sd:Subdistrict)
+            OPTIONAL MATCH (addr)-[:IN_DISTRICT]->(dist:District)
+            OPTIONAL MATCH (addr)-[:IN_PROVINCE]->(prov:Province)
+            OPTIONAL MATCH (addr)-[:HAS_POSTAL_CODE]->(pc:PostalCode)
+            WHERE p IS NOT NULL AND (role.value = 'Plaintiff' OR role.value IS NULL)
+            RETURN DISTINCT 
+                p.name AS person, role.value AS role, c.caseId AS caseId,
+                NULL AS date, NULL AS amount,
+                NULL AS section, NULL AS section_desc,
+                addr.name AS address, sd.name AS subdistrict, dist.name AS district, prov.name AS province, pc.code AS postal_code
+            LIMIT 1
+            """
+
+            def _read_case(tx):
+                # One managed read transaction covers both queries (retried together)
+                facts = [r.data() for r in tx.run(q_facts, cid=case_id, limit=limit)]
+                facts.extend(r.data() for r in tx.run(q_plaintiff, cid=case_id))
                 return facts
-            else:
-                # No case specified: keep original behavior for simplicity
-                q = """
-                MATCH (c:CourtCase)
-                OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
-                OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
-                OPTIONAL MATCH (c)-[:OCCURRED_ON]->(d:Date)
-                OPTIONAL MATCH (c)-[:HAS_AMOUNT]->(m:MoneyAmount)
-                OPTIONAL MATCH (sec:Section)-[:HAS_DESC]->(desc:Section_desc)
-                RETURN DISTINCT 
-                    p.name AS person, role.value AS role, c.caseId AS caseId,
-                    d.name AS date, m.name AS amount,
-                    sec.name AS section, desc.name AS section_desc
-                LIMIT $limit
-                """
-                res = session.run(q, limit=limit)
-                return [r.data() for r in res]
+
+            return session.execute_read(_read_case)
+        else:
+            # No case specified: keep original behavior for simplicity
+            q = """
+            MATCH (c:CourtCase)
+            OPTIONAL MATCH (p:Person)-[:PARTY]->(c)
+            OPTIONAL MATCH (p)-[:HAS_ROLE]->(role:LegalRole)
+            OPTIONAL MATCH (c)-[:OCCURRED_ON]->(d:Date)
+            OPTIONAL MATCH (c)-[:HAS_AMOUNT]->(m:MoneyAmount)
+            OPTIONAL MATCH (sec:Section)-[:HAS_DESC]->(desc:Section_desc)
+            RETURN DISTINCT 
+                p.name AS person, role.value AS role, c.caseId AS caseId,
+                d.name AS date, m.name AS amount,
+                sec.name AS section, desc.name AS section_desc
+            LIMIT $limit
+            """
+            return [r.data() for r in _read_records(session, q, limit=limit)]
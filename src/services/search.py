@@ -1,11 +1,19 @@
 """Search and information retrieval service"""
 
+import heapq
 import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
 from typing import List, Dict, Tuple, Optional
 from contextlib import suppress
-from ..config import MAX_VOCAB_SIZE
+from concurrent.futures import ThreadPoolExecutor
+from operator import mul
+from ..config import MAX_VOCAB_SIZE, TFIDF_CACHE_SIZE, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, FACTS_CACHE_SIZE, EMBED_CACHE_SIZE, API_THREADPOOL_SIZE
 from ..utils.thai_parser import tokenize
-from .neo4j_service import fetch_doc_chunks, graph_retrieve
+from .neo4j_service import DOC_CHUNK_FIELDS, fetch_doc_chunks, doc_chunks_fingerprint, graph_retrieve
 
 # Optional embeddings backend (OpenAI via langchain)
 with suppress(Exception):
@@ -16,17 +24,60 @@ try:  # Fallback if import failed
 except NameError:  # pragma: no cover
     _EMBEDDINGS_AVAILABLE = False
 
+# Per-case write generations (None: the all-cases views), bumped on every invalidation.
+# A cache fill that was computed across a write sees a newer generation and is not stored.
+_GENERATIONS: Dict[Optional[str], int] = {}
+_GENERATIONS_LOCK = threading.Lock()
 
-def build_tfidf(texts: List[str], max_vocab: int = MAX_VOCAB_SIZE) -> Tuple[Dict[str, int], List[float], List[List[float]]]:
-    """Build TF-IDF vectors for documents"""
+# LRU of per-case TF-IDF indexes: case_id -> (fingerprint, docs, vocab, idf, doc_vecs)
+_TFIDF_CACHE: "OrderedDict[Optional[str], tuple]" = OrderedDict()
+_TFIDF_CACHE_LOCK = threading.Lock()
+
+# LRU of hybrid_search results: (query, case_id, k) -> (expires_at, top_docs, facts)
+_SEARCH_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+# LRU of graph_retrieve results: (case_id, limit) -> (expires_at, facts)
+_FACTS_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_FACTS_CACHE_LOCK = threading.Lock()
+
+# LRU of chunk embeddings: chunk text -> L2-normalized float32 vector
+_EMBED_CACHE: "OrderedDict[str, array]" = OrderedDict()
+_EMBED_CACHE_LOCK = threading.Lock()
+
+# Shared embeddings client (reuses its HTTP connection pool across searches)
+_EMBEDDER: Optional["OpenAIEmbeddings"] = None
+_EMBEDDER_LOCK = threading.Lock()
+
+# Background workers for I/O that can overlap the main search path (graph facts).
+# One per handler thread, so concurrent searches never queue behind each other's facts.
+_IO_POOL = ThreadPoolExecutor(max_workers=API_THREADPOOL_SIZE, thread_name_prefix="search-io")
+
+_WS_RE = re.compile(r"\s+")
+_TEXT = DOC_CHUNK_FIELDS.index("text")
+
+
+def _normalize(vec: Dict[int, float]) -> Dict[int, float]:
+    """L2-normalize a sparse vector; zero vectors become empty"""
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    if norm == 0:
+        return {}
+    return {j: v / norm for j, v in vec.items()}
+
+
+def build_tfidf(texts: List[str], max_vocab: int = MAX_VOCAB_SIZE) -> Tuple[Dict[str, int], List[float], List[Dict[int, float]]]:
+    """Build TF-IDF vectors for documents.
+
+    Document vectors are sparse ({vocab index: weight}) and L2-normalized, so
+    cosine similarity against a query vector reduces to a sparse dot product.
+    """
     # Document frequency
-    df = {}
+    df = Counter()
     docs_tokens = []
     for t in texts:
         toks = tokenize(t)
         docs_tokens.append(toks)
-        for w in set(toks):
-            df[w] = df.get(w, 0) + 1
+        df.update(set(toks))
     
     N = max(1, len(texts))
     
@@ -39,52 +90,128 @@ def build_tfidf(texts: List[str], max_vocab: int = MAX_VOCAB_SIZE) -> Tuple[Dict
     for w, idx in vocab.items():
         idf[idx] = math.log((N + 1) / (df[w] + 1)) + 1.0
     
-    # Create document vectors
+    # Create document vectors. Max-TF scaling is a per-document constant that
+    # L2 normalization cancels out, so raw counts give the same unit vector.
     doc_vecs = []
     for toks in docs_tokens:
-        tf = {}
-        for w in toks:
-            if w in vocab:
-                tf[w] = tf.get(w, 0) + 1
-        vec = [0.0] * len(vocab)
-        if tf:
-            max_tf = max(tf.values())
-            for w, c in tf.items():
-                j = vocab[w]
-                vec[j] = (c / max_tf) * idf[j]
-        doc_vecs.append(vec)
+        tf = Counter(w for w in toks if w in vocab)
+        doc_vecs.append(_normalize({vocab[w]: c * idf[vocab[w]] for w, c in tf.items()}))
     
     return vocab, idf, doc_vecs
 
 
-def vectorize_query(q: str, vocab: Dict[str, int], idf: List[float]) -> List[float]:
-    """Convert query to TF-IDF vector"""
-    toks = tokenize(q)
-    tf = {}
-    for w in toks:
-        if w in vocab:
-            tf[w] = tf.get(w, 0) + 1
-    vec = [0.0] * len(vocab)
-    if tf:
-        max_tf = max(tf.values())
-        for w, c in tf.items():
-            j = vocab[w]
-            vec[j] = (c / max_tf) * idf[j]
-    return vec
-
-
-def cosine(a: List[float], b: List[float]) -> float:
-    """Compute cosine similarity between two vectors"""
-    num = 0.0
-    da = 0.0
-    db = 0.0
-    for x, y in zip(a, b):
-        num += x * y
-        da += x * x
-        db += y * y
-    if da == 0 or db == 0:
-        return 0.0
-    return num / (math.sqrt(da) * math.sqrt(db))
+def vectorize_query(q: str, vocab: Dict[str, int], idf: List[float]) -> Dict[int, float]:
+    """Convert query to a sparse, L2-normalized TF-IDF vector"""
+    tf = Counter(w for w in tokenize(q) if w in vocab)
+    return _normalize({vocab[w]: c * idf[vocab[w]] for w, c in tf.items()})
+
+
+def sparse_cosine(qv: Dict[int, float], dv: Dict[int, float]) -> float:
+    """Cosine similarity of two L2-normalized sparse vectors"""
+    if len(qv) > len(dv):
+        qv, dv = dv, qv
+    return sum(w * dv.get(j, 0.0) for j, w in qv.items())
+
+
+def _unit(vec: List[float]) -> List[float]:
+    """L2-normalize a dense vector; zero vectors stay as they are"""
+    norm = math.sqrt(sum(map(mul, vec, vec)))
+    if norm == 0:
+        return list(vec)
+    return [x / norm for x in vec]
+
+
+def unit_cosine(a: List[float], b: List[float]) -> float:
+    """Cosine similarity of two L2-normalized dense vectors (a plain dot product)"""
+    return sum(map(mul, a, b))
+
+
+def _generation(case_id: Optional[str]) -> int:
+    """Current write generation of a case's cached views"""
+    with _GENERATIONS_LOCK:
+        return _GENERATIONS.get(case_id, 0)
+
+
+def _bump_generation(case_id: Optional[str]):
+    """Start a new generation for a case and for the all-cases views"""
+    with _GENERATIONS_LOCK:
+        for cid in {case_id, None}:
+            _GENERATIONS[cid] = _GENERATIONS.get(cid, 0) + 1
+
+
+def case_tfidf_index(case_id: Optional[str] = None) -> Tuple[List[tuple], Dict[str, int], List[float], List[Dict[int, float]]]:
+    """Return (docs, vocab, idf, doc_vecs) for a case, rebuilding only when its chunks changed"""
+    generation = _generation(case_id)
+    fingerprint = doc_chunks_fingerprint(case_id)
+    with _TFIDF_CACHE_LOCK:
+        entry = _TFIDF_CACHE.get(case_id)
+        if entry is not None and entry[0] == fingerprint:
+            _TFIDF_CACHE.move_to_end(case_id)
+            return entry[1:]
+
+    docs = fetch_doc_chunks(case_id)
+    vocab, idf, doc_vecs = build_tfidf([d[_TEXT] for d in docs])
+
+    with _TFIDF_CACHE_LOCK:
+        # Skip the store if the case was invalidated while the index was built
+        if _generation(case_id) == generation:
+            _TFIDF_CACHE[case_id] = (fingerprint, docs, vocab, idf, doc_vecs)
+            _TFIDF_CACHE.move_to_end(case_id)
+            while len(_TFIDF_CACHE) > TFIDF_CACHE_SIZE:
+                _TFIDF_CACHE.popitem(last=False)
+    return docs, vocab, idf, doc_vecs
+
+
+def invalidate_tfidf_cache(case_id: Optional[str] = None):
+    """Drop cached TF-IDF indexes, search results and facts for a case and for the all-cases index"""
+    invalidate_search_results(case_id)
+    with _TFIDF_CACHE_LOCK:
+        _TFIDF_CACHE.pop(case_id, None)
+        _TFIDF_CACHE.pop(None, None)
+
+
+def invalidate_search_results(case_id: Optional[str] = None):
+    """Drop cached search results and facts (but not TF-IDF indexes) for a case and for all cases"""
+    _bump_generation(case_id)
+    with _SEARCH_CACHE_LOCK:
+        for key in [key for key in _SEARCH_CACHE if key[1] in (case_id, None)]:
+            del _SEARCH_CACHE[key]
+    with _FACTS_CACHE_LOCK:
+        for key in [key for key in _FACTS_CACHE if key[0] in (case_id, None)]:
+            del _FACTS_CACHE[key]
+
+
+def cached_graph_retrieve(case_id: Optional[str] = None, limit: int = 20) -> List[dict]:
+    """graph_retrieve behind a short-lived LRU (SEARCH_CACHE_TTL)"""
+    key = (case_id, limit)
+    now = time.monotonic()
+    with _FACTS_CACHE_LOCK:
+        entry = _FACTS_CACHE.get(key)
+        if entry is not None and entry[0] > now:
+            _FACTS_CACHE.move_to_end(key)
+            return list(entry[1])
+
+    generation = _generation(case_id)
+    facts = graph_retrieve(case_id=case_id, limit=limit)
+
+    with _FACTS_CACHE_LOCK:
+        # Skip the store if the case's graph was written to during the read
+        if _generation(case_id) == generation:
+            _FACTS_CACHE[key] = (now + SEARCH_CACHE_TTL, facts)
+            _FACTS_CACHE.move_to_end(key)
+            while len(_FACTS_CACHE) > FACTS_CACHE_SIZE:
+                _FACTS_CACHE.popitem(last=False)
+    return list(facts)
+
+
+def _embedder() -> "OpenAIEmbeddings":
+    """OpenAI embeddings client, created on first use"""
+    global _EMBEDDER
+    with _EMBEDDER_LOCK:
+        if _EMBEDDER is None:
+            # Use a small, fast embedding model; configurable via env if needed
+            _EMBEDDER = OpenAIEmbeddings(model="text-embedding-3-small")
+        return _EMBEDDER
 
 
 def _embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
@@ -95,50 +222,100 @@ def _embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
     if not _EMBEDDINGS_AVAILABLE:
         return None
     try:
-        # Use a small, fast embedding model; configurable via env if needed
-        embedder = OpenAIEmbeddings(model="text-embedding-3-small")
-        vectors = embedder.embed_documents(texts)
-        return vectors
+        return _embedder().embed_documents(texts)
     except Exception:
         return None
 
 
+def _embed_texts_cached(texts: List[str]) -> Optional[List[array]]:
+    """Embed texts as float32 unit vectors, reusing cached ones and sending only the misses in one batch.
+
+    float32 arrays take 4 bytes per dimension instead of a boxed float each,
+    so the cache holds ~8x more chunks in the same memory.
+    """
+    if not _EMBEDDINGS_AVAILABLE:
+        return None
+    with _EMBED_CACHE_LOCK:
+        cached = {t: _EMBED_CACHE[t] for t in texts if t in _EMBED_CACHE}
+    missing = list(dict.fromkeys(t for t in texts if t not in cached))
+    if missing:
+        vectors = _embed_texts(missing)
+        if vectors is None:
+            return None
+        cached.update((t, array("f", _unit(v))) for t, v in zip(missing, vectors))
+    with _EMBED_CACHE_LOCK:
+        for t in texts:
+            _EMBED_CACHE[t] = cached[t]
+            _EMBED_CACHE.move_to_end(t)
+        while len(_EMBED_CACHE) > EMBED_CACHE_SIZE:
+            _EMBED_CACHE.popitem(last=False)
+    return [cached[t] for t in texts]
+
+
 def _embed_query(text: str) -> Optional[List[float]]:
     if not _EMBEDDINGS_AVAILABLE:
         return None
     try:
-        embedder = OpenAIEmbeddings(model="text-embedding-3-small")
-        return embedder.embed_query(text)
+        return _embedder().embed_query(text)
     except Exception:
         return None
 
 
 def hybrid_search(query: str, case_id: Optional[str] = None, k: int = 5) -> Tuple[List[dict], List[dict]]:
-    """Perform hybrid search combining vector similarity, TF-IDF, and graph retrieval."""
-    # Fetch documents
-    docs = fetch_doc_chunks(case_id)
+    """Perform hybrid search combining vector similarity, TF-IDF, and graph retrieval.
+
+    Results are cached per (stripped query, case_id, k) for SEARCH_CACHE_TTL
+    seconds and dropped early when the case is re-ingested.
+    """
+    query = query.strip()
+    key = (query, case_id, k)
+    now = time.monotonic()
+    with _SEARCH_CACHE_LOCK:
+        entry = _SEARCH_CACHE.get(key)
+        if entry is not None and entry[0] > now:
+            _SEARCH_CACHE.move_to_end(key)
+            return list(entry[1]), list(entry[2])
+
+    generation = _generation(case_id)
+    top_docs, facts = _hybrid_search(query, case_id, k)
+
+    with _SEARCH_CACHE_LOCK:
+        # Skip the store if the case was written to while this search ran
+        if _generation(case_id) == generation:
+            _SEARCH_CACHE[key] = (now + SEARCH_CACHE_TTL, top_docs, facts)
+            _SEARCH_CACHE.move_to_end(key)
+            while len(_SEARCH_CACHE) > SEARCH_CACHE_SIZE:
+                _SEARCH_CACHE.popitem(last=False)
+    return list(top_docs), list(facts)
+
+
+def _hybrid_search(query: str, case_id: Optional[str], k: int) -> Tuple[List[dict], List[dict]]:
+    """Uncached hybrid_search"""
+    # Fetch documents with their (cached) TF-IDF index
+    docs, vocab, idf, doc_vecs = case_tfidf_index(case_id)
     if not docs:
         return [], []
 
-    # Build TF-IDF and search
-    texts = [d["text"] for d in docs]
-    vocab, idf, doc_vecs = build_tfidf(texts)
+    # Fetch graph facts concurrently with scoring and embedding calls
+    facts_future = _IO_POOL.submit(cached_graph_retrieve, case_id, 20)
+
+    # Search
+    texts = [d[_TEXT] for d in docs]
     qv = vectorize_query(query, vocab, idf)
 
     # TF-IDF scores
     tfidf_scores: List[float] = []
     for dv in doc_vecs:
-        tfidf_scores.append(max(0.0, cosine(qv, dv)))
+        tfidf_scores.append(max(0.0, sparse_cosine(qv, dv)))
 
     # Vector embeddings scores (optional)
     vec_scores: Optional[List[float]] = None
     q_emb = _embed_query(query)
-    d_embs = _embed_texts(texts) if q_emb is not None else None
+    d_embs = _embed_texts_cached(texts) if q_emb is not None else None
     if q_emb is not None and d_embs is not None:
-        tmp: List[float] = []
-        for ev in d_embs:
-            tmp.append(max(0.0, cosine(q_emb, ev)))
-        vec_scores = tmp
+        # Chunk vectors are cached normalized, so cosine is a dot product
+        q_unit = _unit(q_emb)
+        vec_scores = [max(0.0, unit_cosine(q_unit, ev)) for ev in d_embs]
 
     # Combine scores: prioritize vector similarity when available
     combined: List[Tuple[int, float]] = []
@@ -152,17 +329,13 @@ def hybrid_search(query: str, case_id: Optional[str] = None, k: int = 5) -> Tupl
         combined.append((i, score))
 
     # Rank and select top k
-    combined.sort(key=lambda x: -x[1])
     top_docs = []
-    for idx, score in combined[:k]:
-        item = dict(docs[idx])
+    for idx, score in heapq.nlargest(k, combined, key=lambda x: x[1]):
+        item = dict(zip(DOC_CHUNK_FIELDS, docs[idx]))
         item["score"] = score
         top_docs.append(item)
 
-    # Get graph facts
-    facts = graph_retrieve(case_id=case_id, limit=20)
-    
-    return top_docs, facts
+    return top_docs, facts_future.result()
 
 
 def synthesize_answer(query: str, doc_hits: List[dict], facts: List[dict], case_id: Optional[str] = None) -> str:
@@ -171,19 +344,19 @@ def synthesize_answer(query: str, doc_hits: List[dict], facts: List[dict], case_
     
     # Summary from graph facts
     if facts:
-        roles = []
+        roles = set()
         amounts = set()
         dates = set()
         for f in facts:
             if f.get("person") and f.get("role"):
-                roles.append(f"{f['person']} ({f['role']})")
+                roles.add(f"{f['person']} ({f['role']})")
             if f.get("amount"):
                 amounts.add(f["amount"])
             if f.get("date"):
                 dates.add(f["date"])
         
         if roles:
-            lines.append("คู่ความ/บทบาท: " + ", ".join(sorted(set(roles))))
+            lines.append("คู่ความ/บทบาท: " + ", ".join(sorted(roles)))
         if amounts:
             lines.append("จำนวนเงิน/ค่าจ้างที่ปรากฏ: " + ", ".join(sorted(amounts)))
         if dates:
@@ -193,7 +366,7 @@ def synthesize_answer(query: str, doc_hits: List[dict], facts: List[dict], case_
     if doc_hits:
         lines.append("สาระจากเอกสารที่ใกล้เคียง:")
         for d in doc_hits:
-            preview = d["text"].strip().replace("\n", " ")
+            preview = _WS_RE.sub(" ", d["text"]).strip()
             if len(preview) > 180:
                 preview = preview[:180] + "..."
             lines.append(f"- {preview}")
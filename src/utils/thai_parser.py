@@ -1,15 +1,109 @@
 """Thai text parsing utilities"""
 
 import re
-from typing import Optional, List, Dict
+import string
+from copy import deepcopy
+from functools import lru_cache, wraps
+from typing import Optional, List, Dict, Tuple
 from pythainlp import word_tokenize
 from pythainlp.util import thaiword_to_num
 
-from ..config import THAI_MONTHS, THAI_DIGITS
+from ..config import THAI_MONTHS, THAI_DIGITS, PARSE_CACHE_SIZE, TOKENIZE_CACHE_SIZE
+
+_AMOUNT_DIGIT_RE = re.compile(r"([0-9,]+(?:\.[0-9]+)?)\s*บาท")
+_AMOUNT_WORD_RE = re.compile(r"(?:ปรับ|ค่า|เป็นเงิน|จำนวน|ไม่เกิน|กว่า)\s*([\u0E00-\u0E39\s]+?)\s*บาท")
+_DATE_FULL_RE = re.compile(r"(\d{1,2})\s+([\u0E00-\u0E7F]+)\s+(\d{4})")
+_DATE_MONTH_YEAR_RE = re.compile(r"([\u0E00-\u0E7F]+)\s+(\d{4})")
+_THAI_DIGIT_RE = re.compile(r"[\u0E50-\u0E59]")
+
+
+def _any_of(*patterns: str, flags: int = 0) -> "re.Pattern":
+    """Compile indicator patterns into one alternation, so a single scan tells whether any matches"""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+# Step 4 payment period / termination indicators
+_DAILY_PAY_RE = _any_of(r"ค่าจ้างรายวัน", r"เงินวันละ", r"วันละ\s*\d+\s*บาท", r"ได้รับค่าจ้างรายวัน", r"จ่ายรายวัน")
+_MONTHLY_PAY_RE = _any_of(r"ค่าจ้างรายเดือน", r"เงินเดือน", r"เดือนละ\s*\d+\s*บาท", r"ได้รับค่าจ้างรายเดือน", r"จ่ายรายเดือน")
+_RESIGNATION_RE = _any_of(r"ลาออก", r"ออกจากงาน", r"ขอลาออก", r"ลาออกเอง")
+_MISCONDUCT_RE = _any_of(r"เลิกจ้างเพราะผิดร้ายแรง", r"ผิดร้ายแรง", r"มาตรา\s*119", r"กระทำผิดร้ายแรง", r"ประพฤติผิด")
+_IMMEDIATE_TERMINATION_RE = _any_of(r"เลิกจ้างทันที", r"ไล่ออกทันที", r"ไม่บอกล่วงหน้า", r"เลิกจ้างโดยไม่บอกกล่าวล่วงหน้า")
+
+# Step 5 violation indicators
+_NO_ADVANCE_NOTICE_RE = _any_of(
+    r"ไม่แจ้งล่วงหน้า", r"ไม่บอกกล่าวล่วงหน้า", r"ไม่ได้แจ้งล่วงหน้า", r"ไม่มีการบอกกล่าวล่วงหน้า", r"มิได้มีการบอกกล่าวล่วงหน้า"
+)
+_NO_SEVERANCE_RE = _any_of(r"ไม่ได้ค่าชดเชย", r"ไม่จ่ายค่าชดเชย", r"ไม่ได้รับค่าชดเชย", r"มิได้จ่ายค่าชดเชย")
+
+# Step 6 claim detection: claim category -> its indicator patterns (one scan each)
+_CLAIM_PATTERNS = {
+    "advance_notice_pay": _any_of(
+        r"ค่าบอกกล่าวล่วงหน้า",
+        r"บอกกล่าวล่วงหน้า",
+        r"ค่าแจ้งล่วงหน้า",
+        flags=re.IGNORECASE,
+    ),
+    "severance_pay": _any_of(
+        r"ค่าชดเชย",
+        r"เงินชดเชย",
+        r"ชดเชย",
+        flags=re.IGNORECASE,
+    ),
+    "vacation_pay": _any_of(
+        r"วันหยุดพักร้อน",
+        r"วันหยุดพักผ่อน",
+        r"ค่าจ้างวันหยุด",
+        r"พักผ่อนประจำปี",
+        flags=re.IGNORECASE,
+    ),
+    "unfair_dismissal_damages": _any_of(
+        r"ค่าเสียหายจากเลิกจ้างไม่เป็นธรรม",
+        r"เลิกจ้างไม่เป็นธรรม",
+        r"ค่าเสียหาย.*เลิกจ้าง",
+        r"การเลิกจ้างไม่เป็นธรรม",
+        flags=re.IGNORECASE,
+    ),
+}
+
+# Person / address patterns shared by the step parsers
+_AGE_RE = re.compile(r"(?:อายุ\s*)?(\d{1,3})\s*ปี")
+_TITLE_RE = re.compile(r"(นาย|นางสาว|นาง|เด็กชาย|เด็กหญิง)")
+_SUBDISTRICT_RE = re.compile(r"(?:ต\.|ตำบล|แขวง)\s*([\u0E00-\u0E7F]+)")
+_DISTRICT_RE = re.compile(r"(?:อ\.|อำเภอ|เขต)\s*([\u0E00-\u0E7F]+)")
+_PROVINCE_RE = re.compile(r"(?:จ\.|จังหวัด)\s*([\u0E00-\u0E7F]+)")
+_THAI_WORD_RE = re.compile(r"[\u0E00-\u0E7F]+")
+
+
+class _UnderscoreTable(dict):
+    """str.translate table that keeps its listed characters and maps any other to '_'"""
+
+    def __missing__(self, key: int) -> str:
+        return "_"
+
+
+_LABEL_TRANS = _UnderscoreTable((c, c) for c in map(ord, string.ascii_letters + string.digits + "_"))
+_REL_TRANS = _UnderscoreTable((c, c) for c in map(ord, string.ascii_uppercase + string.digits + "_"))
+# ASCII lowercase + Thai digit normalization in a single translate pass
+_TOK_TRANS = {**THAI_DIGITS, **str.maketrans(string.ascii_uppercase, string.ascii_lowercase)}
+
+
+def _memoize_parse(fn):
+    """lru_cache a text -> dict parser; each caller gets its own copy of the result"""
+    cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(fn)
+
+    @wraps(fn)
+    def wrapper(text: str) -> Dict:
+        return deepcopy(cached(text))
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
 
 
 def normalize_thai_digits(text: str) -> str:
     """Convert Thai digits to Arabic digits"""
+    # translate() maps non-ASCII text char by char into a new string; skip it when there is nothing to map
+    if not _THAI_DIGIT_RE.search(text):
+        return text
     return text.translate(THAI_DIGITS)
 
 
@@ -19,7 +113,7 @@ def parse_thai_amount(text: str) -> Optional[float]:
         return None
 
     # First, try to match standard digits (e.g., "10,000.50 บาท")
-    m_digit = re.search(r"([0-9,]+(?:\.[0-9]+)?)\s*บาท", text)
+    m_digit = _AMOUNT_DIGIT_RE.search(text)
     if m_digit:
         try:
             return float(m_digit.group(1).replace(",", ""))
@@ -27,9 +121,7 @@ def parse_thai_amount(text: str) -> Optional[float]:
             pass  # Fall through to word-based parser
 
     # Second, try to match Thai number words (e.g., "หนึ่งหมื่นบาท")
-    m_word = re.search(
-        r"(?:ปรับ|ค่า|เป็นเงิน|จำนวน|ไม่เกิน|กว่า)\s*([\u0E00-\u0E39\s]+?)\s*บาท", text
-    )
+    m_word = _AMOUNT_WORD_RE.search(text)
     if m_word:
         num_text = m_word.group(1).strip()
         try:
@@ -48,7 +140,7 @@ def parse_thai_date_iso(text: str) -> Optional[str]:
     s = text.strip()
     
     # Pattern: DD month YYYY
-    m = re.search(r"(\d{1,2})\s+([\u0E00-\u0E7F]+)\s+(\d{4})", s)
+    m = _DATE_FULL_RE.search(s)
     if m:
         d = int(m.group(1))
         mon_name = m.group(2)
@@ -60,7 +152,7 @@ def parse_thai_date_iso(text: str) -> Optional[str]:
             return f"{y:04d}-{mon:02d}-{d:02d}"
     
     # Pattern: month YYYY
-    m2 = re.search(r"([\u0E00-\u0E7F]+)\s+(\d{4})", s)
+    m2 = _DATE_MONTH_YEAR_RE.search(s)
     if m2:
         mon_name = m2.group(1)
         y = int(m2.group(2))
@@ -73,19 +165,24 @@ def parse_thai_date_iso(text: str) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=TOKENIZE_CACHE_SIZE)
+def _tokenize_cached(s: str) -> Tuple[str, ...]:
+    """Memoized dictionary segmentation; TF-IDF rebuilds re-tokenize the same chunks"""
+    toks = word_tokenize(s.translate(_TOK_TRANS), engine="newmm")
+    return tuple(t for t in toks if t and not t.isspace())
+
+
 def tokenize(s: str) -> List[str]:
     """Smart Thai/English tokenizer using pythainlp"""
     if not s:
         return []
-    s = normalize_thai_digits(s.lower())
-    toks = word_tokenize(s)
-    return [t for t in toks if t and not t.isspace()]
+    return list(_tokenize_cached(s))
 
 
 def sanitize_label(label: str) -> str:
     """Sanitize string to be a valid Neo4j label"""
     label = label or "Entity"
-    label = re.sub(r"[^A-Za-z0-9_]", "_", label)
+    label = label.translate(_LABEL_TRANS)
     if not label:
         label = "Entity"
     if label[0].isdigit():
@@ -96,7 +193,7 @@ def sanitize_label(label: str) -> str:
 def sanitize_rel_type(rtype: str) -> str:
     """Sanitize string to be a valid Neo4j relationship type"""
     rtype = (rtype or "RELATES_TO").upper()
-    rtype = re.sub(r"[^A-Z0-9_]", "_", rtype)
+    rtype = rtype.translate(_REL_TRANS)
     if not rtype:
         rtype = "RELATES_TO"
     if rtype[0].isdigit():
@@ -105,6 +202,7 @@ def sanitize_rel_type(rtype: str) -> str:
 
 
 # --- Person / Address parsing ---
+@_memoize_parse
 def parse_person_address(text: str) -> Dict:
     """Parse Thai free text into person + address fields.
     Returns dict with keys: title, name_parts, full_name, age, house_no, subdistrict, district, province, postal_code
@@ -113,17 +211,17 @@ def parse_person_address(text: str) -> Dict:
 
     # Age
     age: Optional[int] = None
-    m_age = re.search(r"(?:อายุ\s*)?(\d{1,3})\s*ปี", s)
+    m_age = _AGE_RE.search(s)
     if m_age:
         try:
             age = int(m_age.group(1))
         except Exception:
             age = None
-    s_wo_age = re.sub(r"(?:อายุ\s*)?\d{1,3}\s*ปี", " ", s)
+    s_wo_age = _AGE_RE.sub(" ", s)
 
     # Title
     title = None
-    m_title = re.search(r"(นาย|นางสาว|นาง|เด็กชาย|เด็กหญิง)", s_wo_age)
+    m_title = _TITLE_RE.search(s_wo_age)
     if m_title:
         title = m_title.group(1)
 
@@ -159,13 +257,13 @@ def parse_person_address(text: str) -> Dict:
     district = None
     province = None
 
-    m_sd = re.search(r"(?:ต\.|ตำบล|แขวง)\s*([\u0E00-\u0E7F]+)", s)
+    m_sd = _SUBDISTRICT_RE.search(s)
     if m_sd:
         subdistrict = m_sd.group(1)
-    m_d = re.search(r"(?:อ\.|อำเภอ|เขต)\s*([\u0E00-\u0E7F]+)", s)
+    m_d = _DISTRICT_RE.search(s)
     if m_d:
         district = m_d.group(1)
-    m_p = re.search(r"(?:จ\.|จังหวัด)\s*([\u0E00-\u0E7F]+)", s)
+    m_p = _PROVINCE_RE.search(s)
     if m_p:
         province = m_p.group(1)
     else:
@@ -239,6 +337,7 @@ PROVINCE_ALIASES = {
     "สกน": "สกลนคร"
 }
 
+@_memoize_parse
 def llm_normalize_plaintiff(text: str) -> Dict:
     """Normalize plaintiff info using LLM with fallback to rule-based parsing."""
     # เริ่มต้นด้วย rule-based parsing
@@ -287,7 +386,7 @@ def _infer_from_text(raw: str, data: Dict) -> Dict:
 
     # house_no fallback: ตัวเลข 1-6 หลัก (ลดขั้นต่ำเป็น 1 หลัก)
     if not data.get("house_no"):
-        s_wo_age = re.sub(r"(?:อายุ\s*)?\d{1,3}\s*ปี", " ", s)
+        s_wo_age = _AGE_RE.sub(" ", s)
         # จับทั้งแบบมี/ไม่มี "บ้านเลขที่" แต่ต้องไม่ใช่เลขอายุ
         m_house = re.search(r"(?:บ้านเลขที่\s*)?(\d{1,6}(?:/\d{1,4})?)", s_wo_age)
         if m_house:
@@ -295,7 +394,7 @@ def _infer_from_text(raw: str, data: Dict) -> Dict:
 
     # province สุดท้าย: ถ้ายังไม่มี ให้เดาจาก token ไทยสุดท้ายในข้อความ
     if not data.get("province"):
-        thai_tokens = re.findall(r"[\u0E00-\u0E7F]+", s)
+        thai_tokens = _THAI_WORD_RE.findall(s)
         if thai_tokens:
             last_token = thai_tokens[-1]
             # ตรวจสอบว่า token สุดท้ายเป็นจังหวัดหรือไม่
@@ -315,6 +414,7 @@ def _infer_from_text(raw: str, data: Dict) -> Dict:
     return data
 
 
+@_memoize_parse
 def parse_defendant_info(text: str) -> Dict:
     """Parse defendant information (person or company) from Thai text.
     Returns dict with keys: entity_type, name, address, phone, etc.
@@ -354,7 +454,7 @@ def parse_defendant_info(text: str) -> Dict:
                         name = first_part.strip()
     else:
         # Person name (similar to plaintiff parsing)
-        m_title = re.search(r"(นาย|นางสาว|นาง|เด็กชาย|เด็กหญิง)", s)
+        m_title = _TITLE_RE.search(s)
         title = m_title.group(1) if m_title else "นาย"
         
         # Extract name parts after title
@@ -366,7 +466,7 @@ def parse_defendant_info(text: str) -> Dict:
         name_zone = re.split(r"(อยู่|ตั้งอยู่|โทร|บ้านเลขที่)", name_zone)[0].strip()
         
         # Get name parts
-        name_parts = re.findall(r"[\u0E00-\u0E7F]+", name_zone)[:3]  # max 3 parts
+        name_parts = _THAI_WORD_RE.findall(name_zone)[:3]  # max 3 parts
         if name_parts:
             name = f"{title} {' '.join(name_parts)}"
     
@@ -411,18 +511,18 @@ def _extract_address_from_text(text: str) -> Dict:
     
     # District (อำเภอ/เขต)
     district = None
-    m_district = re.search(r"(?:อำเภอ|เขต|อ\.)\s*([\u0E00-\u0E7F]+)", s)
+    m_district = _DISTRICT_RE.search(s)
     if m_district:
         district = m_district.group(1)
     
     # Province
     province = None
-    m_province = re.search(r"(?:จังหวัด|จ\.)\s*([\u0E00-\u0E7F]+)", s)
+    m_province = _PROVINCE_RE.search(s)
     if m_province:
         province = m_province.group(1)
     elif district:
         # Try to infer province from district + context
-        thai_tokens = re.findall(r"[\u0E00-\u0E7F]+", s)
+        thai_tokens = _THAI_WORD_RE.findall(s)
         for i, token in enumerate(thai_tokens):
             if token == district and i + 1 < len(thai_tokens):
                 next_token = thai_tokens[i + 1]
@@ -545,76 +645,28 @@ def parse_payment_period_and_termination(text: str) -> Dict:
     payment_period = "รายเดือน"  # Default
     
     # Check for daily payment indicators
-    daily_indicators = [
-        r"ค่าจ้างรายวัน",
-        r"เงินวันละ",
-        r"วันละ\s*\d+\s*บาท",
-        r"ได้รับค่าจ้างรายวัน",
-        r"จ่ายรายวัน"
-    ]
-    
-    for pattern in daily_indicators:
-        if re.search(pattern, s):
-            payment_period = "รายวัน"
-            break
+    if _DAILY_PAY_RE.search(s):
+        payment_period = "รายวัน"
     
     # Check for monthly payment indicators
-    monthly_indicators = [
-        r"ค่าจ้างรายเดือน",
-        r"เงินเดือน",
-        r"เดือนละ\s*\d+\s*บาท",
-        r"ได้รับค่าจ้างรายเดือน",
-        r"จ่ายรายเดือน"
-    ]
-    
-    for pattern in monthly_indicators:
-        if re.search(pattern, s):
-            payment_period = "รายเดือน"
-            break
+    if _MONTHLY_PAY_RE.search(s):
+        payment_period = "รายเดือน"
     
     # Parse termination reason
     termination_reason = "เลิกจ้างโดยนายจ้าง"  # Default
     
     # Check for resignation
-    resignation_patterns = [
-        r"ลาออก",
-        r"ออกจากงาน",
-        r"ขอลาออก",
-        r"ลาออกเอง"
-    ]
-    
-    for pattern in resignation_patterns:
-        if re.search(pattern, s):
-            termination_reason = "ลาออกเอง"
-            break
+    if _RESIGNATION_RE.search(s):
+        termination_reason = "ลาออกเอง"
     
     # Check for serious misconduct termination
-    misconduct_patterns = [
-        r"เลิกจ้างเพราะผิดร้ายแรง",
-        r"ผิดร้ายแรง",
-        r"มาตรา\s*119",
-        r"กระทำผิดร้ายแรง",
-        r"ประพฤติผิด"
-    ]
-    
-    for pattern in misconduct_patterns:
-        if re.search(pattern, s):
-            termination_reason = "เลิกจ้างเพราะผิดร้ายแรง"
-            break
+    if _MISCONDUCT_RE.search(s):
+        termination_reason = "เลิกจ้างเพราะผิดร้ายแรง"
     
     # Check for immediate termination
-    immediate_patterns = [
-        r"เลิกจ้างทันที",
-        r"ไล่ออกทันที",
-        r"ไม่บอกล่วงหน้า",
-        r"เลิกจ้างโดยไม่บอกกล่าวล่วงหน้า"
-    ]
-    
-    for pattern in immediate_patterns:
-        if re.search(pattern, s):
-            if "ผิดร้ายแรง" not in termination_reason:
-                termination_reason = "เลิกจ้างโดยนายจ้างโดยไม่บอกกล่าวล่วงหน้า"
-            break
+    if _IMMEDIATE_TERMINATION_RE.search(s):
+        if "ผิดร้ายแรง" not in termination_reason:
+            termination_reason = "เลิกจ้างโดยนายจ้างโดยไม่บอกกล่าวล่วงหน้า"
     
     return {
         "payment_period": payment_period,
@@ -623,6 +675,7 @@ def parse_payment_period_and_termination(text: str) -> Dict:
     }
 
 
+@_memoize_parse
 def parse_employment_info(text: str) -> Dict:
     """Parse employment information from Thai text.
     Returns dict with keys: start_date, position, daily_wage, years, months, total_days, etc.
@@ -897,6 +950,35 @@ def calculate_labor_law_interest(principal_amount: float, days_overdue: int) ->
     }
 
 
+def calculate_employment_entitlements(employment_info: Dict) -> Dict:
+    """Run the Section 118, Section 9 and Section 17 calculations for parsed employment info.
+
+    Returns {"severance", "interest", "advance_notice"}; each is None when its inputs are missing.
+    """
+    daily_wage = employment_info.get("daily_wage")
+
+    severance = None
+    if daily_wage and employment_info.get("years") is not None:
+        severance = calculate_severance_pay(
+            daily_wage,
+            employment_info.get("years", 0),
+            employment_info.get("months", 0)
+        )
+
+    interest = None
+    advance_notice = None
+    if daily_wage:
+        # Example calculation for unpaid wages (assume 30 days unpaid, 30 days overdue)
+        interest = calculate_labor_law_interest(daily_wage * 30, 30)
+        advance_notice = calculate_advance_notice_pay(
+            daily_wage,
+            employment_info.get("payment_period", "รายเดือน"),
+            employment_info.get("termination_reason", "เลิกจ้างโดยนายจ้าง")
+        )
+
+    return {"severance": severance, "interest": interest, "advance_notice": advance_notice}
+
+
 def format_employment_summary(employment_info: Dict, case_id: str = None) -> str:
     """Format employment information into a readable Thai summary."""
     parts = []
@@ -993,45 +1075,24 @@ def parse_termination_info(text: str) -> Dict:
     violations = []
     
     # Check for advance notice violation
-    no_advance_notice = False
-    advance_notice_patterns = [
-        r"ไม่แจ้งล่วงหน้า",
-        r"ไม่บอกกล่าวล่วงหน้า",
-        r"ไม่ได้แจ้งล่วงหน้า",
-        r"ไม่มีการบอกกล่าวล่วงหน้า",
-        r"มิได้มีการบอกกล่าวล่วงหน้า"
-    ]
-    
-    for pattern in advance_notice_patterns:
-        if re.search(pattern, s):
-            no_advance_notice = True
-            violations.append({
-                "type": "ไม่บอกกล่าวล่วงหน้า",
-                "description": "ไม่มีการบอกกล่าวล่วงหน้าตามมาตรา 17",
-                "legal_reference": "มาตรา 17 พระราชบัญญัติคุ้มครองแรงงาน พ.ศ. ๒๕๔๑",
-                "violation_severity": "สูง"
-            })
-            break
+    no_advance_notice = bool(_NO_ADVANCE_NOTICE_RE.search(s))
+    if no_advance_notice:
+        violations.append({
+            "type": "ไม่บอกกล่าวล่วงหน้า",
+            "description": "ไม่มีการบอกกล่าวล่วงหน้าตามมาตรา 17",
+            "legal_reference": "มาตรา 17 พระราชบัญญัติคุ้มครองแรงงาน พ.ศ. ๒๕๔๑",
+            "violation_severity": "สูง"
+        })
     
     # Check for severance pay violation
-    no_severance_pay = False
-    severance_patterns = [
-        r"ไม่ได้ค่าชดเชย",
-        r"ไม่จ่ายค่าชดเชย",
-        r"ไม่ได้รับค่าชดเชย",
-        r"มิได้จ่ายค่าชดเชย"
-    ]
-    
-    for pattern in severance_patterns:
-        if re.search(pattern, s):
-            no_severance_pay = True
-            violations.append({
-                "type": "ไม่จ่ายค่าชดเชย",
-                "description": "ไม่จ่ายค่าชดเชยตามมาตรา 118",
-                "legal_reference": "มาตรา 118 พระราชบัญญัติคุ้มครองแรงงาน พ.ศ. ๒๕๔๑",
-                "violation_severity": "สูงมาก"
-            })
-            break
+    no_severance_pay = bool(_NO_SEVERANCE_RE.search(s))
+    if no_severance_pay:
+        violations.append({
+            "type": "ไม่จ่ายค่าชดเชย",
+            "description": "ไม่จ่ายค่าชดเชยตามมาตรา 118",
+            "legal_reference": "มาตรา 118 พระราชบัญญัติคุ้มครองแรงงาน พ.ศ. ๒๕๔๑",
+            "violation_severity": "สูงมาก"
+        })
     
     # Generate legal summary
     legal_summary_parts = []
@@ -1175,44 +1236,16 @@ def parse_court_claims(text: str) -> Dict:
         }
     }
     
-    # Additional patterns for claim detection
-    claim_patterns = {
-        "advance_notice_pay": [
-            r"ค่าบอกกล่าวล่วงหน้า",
-            r"บอกกล่าวล่วงหน้า",
-            r"ค่าแจ้งล่วงหน้า"
-        ],
-        "severance_pay": [
-            r"ค่าชดเชย",
-            r"เงินชดเชย",
-            r"ชดเชย"
-        ],
-        "vacation_pay": [
-            r"วันหยุดพักร้อน",
-            r"วันหยุดพักผ่อน",
-            r"ค่าจ้างวันหยุด",
-            r"พักผ่อนประจำปี"
-        ],
-        "unfair_dismissal_damages": [
-            r"ค่าเสียหายจากเลิกจ้างไม่เป็นธรรม",
-            r"เลิกจ้างไม่เป็นธรรม",
-            r"ค่าเสียหาย.*เลิกจ้าง",
-            r"การเลิกจ้างไม่เป็นธรรม"
-        ]
-    }
-    
     # Detect claims from input text
     detected_claims = []
     
-    for category, patterns in claim_patterns.items():
-        for pattern in patterns:
-            if re.search(pattern, s, re.IGNORECASE):
-                # Find matching claim type
-                for claim_key, claim_info in claim_types.items():
-                    if claim_info["category"] == category:
-                        detected_claims.append(claim_info)
-                        break
-                break
+    for category, pattern_re in _CLAIM_PATTERNS.items():
+        if pattern_re.search(s):
+            # Find matching claim type
+            for claim_key, claim_info in claim_types.items():
+                if claim_info["category"] == category:
+                    detected_claims.append(claim_info)
+                    break
     
     # Generate formal court request
     if detected_claims:
@@ -1967,8 +2000,12 @@ def upsert_financial_summary_to_graph(financial_info: Dict, case_id: str):
         print(f"Added financial summary to case {case_id}")
 
 
-def upsert_employment_to_graph(employment_info: Dict, case_id: str):
-    """Add employment information to Neo4j graph and link to court case."""
+def upsert_employment_to_graph(employment_info: Dict, case_id: str, entitlements: Optional[Dict] = None):
+    """Add employment information to Neo4j graph and link to court case.
+
+    ``entitlements`` may carry calculate_employment_entitlements() output to avoid recomputing it.
+    """
+    entitlements = entitlements or {}
     from ..services.neo4j_service import upsert_graph
     from ..models.graph import SimpleNode, SimpleRel, SimpleGraphDocument
     
@@ -2015,7 +2052,7 @@ def upsert_employment_to_graph(employment_info: Dict, case_id: str):
         
         # Severance pay node (if applicable)
         if employment_info.get("years") is not None and employment_info.get("daily_wage"):
-            severance_info = calculate_severance_pay(
+            severance_info = entitlements.get("severance") or calculate_severance_pay(
                 employment_info["daily_wage"], 
                 employment_info.get("years", 0), 
                 employment_info.get("months", 0)
@@ -2055,7 +2092,7 @@ def upsert_employment_to_graph(employment_info: Dict, case_id: str):
     
     # Advance notice pay node (if applicable)
     if employment_info.get("daily_wage") and employment_info.get("payment_period"):
-        advance_notice_info = calculate_advance_notice_pay(
+        advance_notice_info = entitlements.get("advance_notice") or calculate_advance_notice_pay(
             employment_info["daily_wage"],
             employment_info["payment_period"],
             employment_info.get("termination_reason", "เลิกจ้างโดยนายจ้าง")